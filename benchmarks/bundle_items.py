@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+"""Compares package row extraction with one css query per field against the single walk of Bundle._parseItem.
+
+    curl -b "birthtime=28801; mature_content=1" https://store.steampowered.com/bundle/232/ -o bundle_232.html
+    python benchmarks/bundle_items.py bundle_232.html [more pages ...]
+"""
+
+import os, sys, timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from steamstorefront.bundle import Bundle
+
+
+# package row extraction before the single walk, one select per field
+def selectItem(item):
+    package_item = {}
+    try:
+        package_item['name'] = item.select('.tab_item_name')[0].text
+    except IndexError:
+        package_item['name'] = None
+    try:
+        package_item['packageid'] = item.get('data-ds-packageid')
+        package_item['appid'] = [int(appid) for appid in item.get('data-ds-appid').split(",")]
+    except AttributeError:
+        package_item['appid'] = int(item.get('data-ds-appid'))
+    try:
+        package_item['app_link'] = item.select('.tab_item_overlay')[0].get('href')
+    except IndexError:
+        package_item['app_link'] = None
+    try:
+        package_item['app_image'] = item.select('.tab_item_cap_img')[0].get('src')
+    except IndexError:
+        package_item['app_image'] = None
+    package_item['app_price'] = {}
+    try:
+        package_item['app_price']['final'] = int(item.select('.discount_block')[0].get('data-price-final'))
+        package_item['app_price']['final_formatted'] = item.select('.discount_final_price')[0].text
+    except (IndexError, TypeError):
+        package_item['app_price']['final'] = None
+        package_item['app_price']['final_formatted'] = None
+    package_item['platforms'] = {}
+    package_item['platforms']['windows'] = True if item.select('.win') else False
+    package_item['platforms']['mac'] = True if item.select('.mac') else False
+    package_item['platforms']['linux'] = True if item.select('.linux') else False
+    try:
+        package_item['categories'] = item.select('.tab_item_details')[0].text.strip().split(",")
+    except IndexError:
+        package_item['categories'] = None
+    return package_item
+
+
+def main(paths, number=20):
+    print('{:<32}{:>8}{:>12}{:>12}{:>10}'.format('page', 'items', 'select', 'walk', 'speedup'))
+    for path in paths:
+        with open(path, 'rb') as f:
+            soup = BeautifulSoup(f.read(), Bundle.parser)
+        items = soup.find_all('div', {'class': 'tab_item'})
+        if [selectItem(item) for item in items] != [Bundle._parseItem(item) for item in items]:
+            print('{:<32} output differs'.format(os.path.basename(path)[:31]))
+            continue
+
+        select = min(timeit.repeat(lambda: [selectItem(item) for item in items], number=number, repeat=3)) / number
+        walk = min(timeit.repeat(lambda: [Bundle._parseItem(item) for item in items], number=number, repeat=3)) / number
+        print('{:<32}{:>8}{:>10.2f}ms{:>10.2f}ms{:>9.1f}x'.format(os.path.basename(path)[:31], len(items),
+                                                                  select * 1000, walk * 1000, select / walk))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    main(sys.argv[1:])
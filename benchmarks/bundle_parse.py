@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+
+"""Compares parse time and output of every available parser on saved bundle pages.
+
+    curl -b "birthtime=28801; mature_content=1" https://store.steampowered.com/bundle/12231/ -o bundle_12231.html
+    python benchmarks/bundle_parse.py bundle_12231.html [more pages ...]
+"""
+
+import os, sys, timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4.builder import builder_registry
+from steamstorefront.bundle import parsePage
+
+parsers = ('html5lib', 'html.parser', 'lxml')
+
+
+def main(paths, number=10):
+    pages = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            pages.append((os.path.basename(path), f.read()))
+
+    available = [parser for parser in parsers if builder_registry.lookup(parser)]
+    print('{:<32}{:>12}'.format('page', 'bytes') + ''.join('{:>15}'.format(parser) for parser in available))
+
+    for name, content in pages:
+        row = '{:<32}{:>12}'.format(name[:31], len(content))
+        expected = None
+        for parser in available:
+            # parsed directly, Bundle._parse would serve repeats from its page memo
+            details = parsePage(content, parser)
+            seconds = min(timeit.repeat(lambda: parsePage(content, parser), number=number, repeat=3)) / number
+            if expected is None:
+                expected = details
+            # output has to match html5lib to be a drop in replacement
+            row += '{:>13.1f}{}'.format(seconds * 1000, 'ms' if details == expected else '!')
+        print(row)
+    print("times are per page, ! marks output different from {}".format(available[0]))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    main(sys.argv[1:])
@@ -35,6 +35,10 @@ setup(
     ],
     description="Steam Store Front is an easy to use package to get game or app details from steam store.",
     install_requires=requirements,
+    extras_require={
+        'async': ['aiohttp>=3.6.0'],
+        'fast': ['rapidfuzz>=1.0.0', 'numpy>=1.16.0', 'lxml>=4.2.0'],
+    },
     license="MIT license",
     long_description=readme,
     long_description_content_type='text/x-rst',
@@ -7,6 +7,10 @@ __version__ = '0.0.3.8'
 import builtins
 
 from .steamstorefront import SteamStoreFront
-from .errors import InvalidArgument
+from .asyncstorefront import AsyncSteamStoreFront
+from .errors import InvalidArgument, RateLimited, AppsLoading
+from .cache import LRUCache, SQLiteCache
+from .session import Session
+from .ratelimit import RateLimiter
 
 builtins.InvalidArgument = InvalidArgument
@@ -1,4 +1,23 @@
-import requests, w3lib.html, math
+import copy, requests, w3lib.html, math
+from .cache import LRUCache
+from .session import Session
+
+
+class AppDetails(dict):
+    '''
+        appdetails payload with views derived from it, eg:- requirements as dicts
+        views are computed on first use and pickled with the payload
+    '''
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.views = {}
+
+    # returns view, computing it once
+    def view(self, name, compute):
+        if name not in self.views:
+            self.views[name] = compute()
+        return self.views[name]
 
 
 class App:
@@ -6,6 +25,26 @@ class App:
     data = {}
     appid = 0
 
+    def __init__(self, cache=None, session=None, currency=None, language=None, prices=None):
+        self.cache = cache if cache is not None else LRUCache()
+        self.session = session if session is not None else Session()
+        self.prices = prices
+        self.currency = currency
+        self.language = language
+
+    # returns cache key for appid
+    def _key(self, appid):
+        return ('app', appid, self.currency, self.language)
+
+    # returns appdetails url for appid
+    def _url(self, appid):
+        url = self.api_url + appid
+        if self.currency:
+            url += "&cc=" + self.currency
+        if self.language:
+            url += "&l=" + self.language
+        return url
+
     def _getNormal(self, text):
         text = text.replace("\"", "").replace("<img src=", "").replace(" >", "")
         return text.replace("<br><br>", "\n")
@@ -112,20 +151,42 @@ class App:
         self.appid = appid
 
         # request the data
-        res = requests.get(self.api_url + appid)
+        res = self.session.get(self._url(appid))
 
         if res.status_code == requests.codes.ok:
-            json = res.json()
-            if json[appid]['success']:
-                self.data = json[appid]['data']
-            return self.data
+            return self._parse(appid, res.json())
         else:
             return None
 
-    # populate internal data dictionary
+    # stores data from appdetails json
+    def _parse(self, appid, json):
+        if json[appid]['success']:
+            self.data = AppDetails(json[appid]['data'])
+            self.cache.set(self._key(appid), self.data)
+        else:
+            self.data = {}
+        return self.data
+
+    # populate internal data dictionary from cache, returns data or None if the request failed
     def _populate(self, appid):
-        if not self.data or appid != self.appid or str(self.data['steam_appid']) != appid:
-            self.getRaw(appid)
+        data = self.cache.get(self._key(appid))
+        if data is None:
+            data = self.getRaw(appid)
+        # payloads cached by older versions have no views
+        elif not isinstance(data, AppDetails):
+            data = AppDetails(data)
+        self.appid = appid
+        self.data = data if data is not None else {}
+        return data
+
+    # returns copy of view of the payload, computed on first use
+    def _view(self, name, compute):
+        if name not in self.data.views:
+            self.data.view(name, compute)
+            # persistent caches store a copy, store it again with the new view without renewing its ttl
+            self.cache.replace(self._key(self.appid), self.data)
+        # callers changing a view do not change the cached one
+        return copy.deepcopy(self.data.views[name])
 
     # returns name
     def getName(self, appid):
@@ -159,7 +220,7 @@ class App:
 
         # if normal remove just html tags, retain images link
         if format.lower() == "normal":
-            return self._getNormal(self.data['detailed_description']) if 'detailed_description' in self.data else None
+            return self._view('detailed_description:normal', lambda: self._getNormal(self.data['detailed_description'])) if 'detailed_description' in self.data else None
         else:
             return self.data['detailed_description'] if 'detailed_description' in self.data else None
 
@@ -169,7 +230,7 @@ class App:
         self._populate(appid)
         # if normal remove just html tags, retain images link
         if format.lower() == "normal":
-            return self._getNormal(self.data['about_the_game']) if 'about_the_game' in self.data else None
+            return self._view('about_the_game:normal', lambda: self._getNormal(self.data['about_the_game'])) if 'about_the_game' in self.data else None
         else:
             return self.data['about_the_game'] if 'about_the_game' in self.data else None
 
@@ -189,11 +250,11 @@ class App:
     def getSupportedLanguages(self, appid, format: str = None):
         self._populate(appid)
         if format.lower() == "normal":
-            return self._getNormalLanguage(
-                self.data['supported_languages']) if 'supported_languages' in self.data else None
+            return self._view('supported_languages:normal', lambda: self._getNormalLanguage(
+                self.data['supported_languages'])) if 'supported_languages' in self.data else None
         elif format.lower() == "list":
-            return self._getNormalLanguage(self.data['supported_languages']).split(
-                ", ") if 'supported_languages' in self.data else None
+            return self._view('supported_languages:list', lambda: self._getNormalLanguage(
+                self.data['supported_languages']).split(", ")) if 'supported_languages' in self.data else None
         else:
             return self.data['supported_languages'] if 'supported_languages' in self.data else None
 
@@ -210,7 +271,7 @@ class App:
     def getReviews(self, appid, format: str = None):
         self._populate(appid)
         if format.lower() == "list":
-            return self._getListReview(self.data['reviews']) if 'reviews' in self.data else None
+            return self._view('reviews:list', lambda: self._getListReview(self.data['reviews'])) if 'reviews' in self.data else None
         else:
             return self.data['reviews'] if 'reviews' in self.data else None
 
@@ -229,8 +290,8 @@ class App:
     def getPCRequirements(self, appid, format: str = None):
         self._populate(appid)
         if format.lower() == "dict":
-            return self._getDictionaryRequirements(
-                self.data['pc_requirements']) if 'pc_requirements' in self.data else None
+            return self._view('pc_requirements:dict', lambda: self._getDictionaryRequirements(
+                self.data['pc_requirements'])) if 'pc_requirements' in self.data else None
         else:
             return self.data['pc_requirements'] if 'pc_requirements' in self.data else None
 
@@ -240,8 +301,8 @@ class App:
         self._populate(appid)
 
         if format.lower() == "dict":
-            return self._getDictionaryRequirements(
-                self.data['mac_requirements']) if 'mac_requirements' in self.data else None
+            return self._view('mac_requirements:dict', lambda: self._getDictionaryRequirements(
+                self.data['mac_requirements'])) if 'mac_requirements' in self.data else None
         else:
             return self.data['mac_requirements'] if 'mac_requirements' in self.data else None
 
@@ -250,8 +311,8 @@ class App:
     def getLinuxRequirements(self, appid, format: str = None):
         self._populate(appid)
         if format.lower() == "dict":
-            return self._getDictionaryRequirements(
-                self.data['linux_requirements']) if 'linux_requirements' in self.data else None
+            return self._view('linux_requirements:dict', lambda: self._getDictionaryRequirements(
+                self.data['linux_requirements'])) if 'linux_requirements' in self.data else None
         else:
             return self.data['linux_requirements'] if 'linux_requirements' in self.data else None
 
@@ -356,8 +417,15 @@ class App:
         # returns ratings
 
     def getRatings(self, appid):
-        req = requests.get("https://store.steampowered.com/appreviews/" + appid + "?json=1").json()
+        req = self.session.get(self._ratingsUrl(appid)).json()
+        return self._getRatings(req)
 
+    # returns appreviews url for appid
+    def _ratingsUrl(self, appid):
+        return "https://store.steampowered.com/appreviews/" + appid + "?json=1"
+
+    # calculates ratings from appreviews json
+    def _getRatings(self, req):
         if req["query_summary"]:
             # Review Score = frac{Positive Reviews}{Total Reviews}
             try:
@@ -373,8 +441,19 @@ class App:
 
     # returns price in specific currency
     def getPriceInCurrency(self, appid, currency):
-        req = requests.get(self.api_url + appid + "&cc=" + currency + "&filters=price_overview").json()
+        # joins lookups from other threads into one request
+        if self.prices is not None:
+            return self.prices.get(appid, currency)
+
+        req = self.session.get(self._priceUrl(appid, currency)).json()
+        return self._getPriceInCurrency(appid, req)
+
+    # returns price only appdetails url for appid
+    def _priceUrl(self, appid, currency):
+        return self.api_url + appid + "&cc=" + currency + "&filters=price_overview"
 
+    # extracts price overview from appdetails json
+    def _getPriceInCurrency(self, appid, req):
         if req[appid]["data"]:
             return req[appid]["data"]["price_overview"]
         else:
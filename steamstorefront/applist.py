@@ -0,0 +1,268 @@
+import array, codecs, email.utils, json, os, re, requests, struct, threading, time
+from .session import Session
+from .storage import readArrays, writeArrays
+
+
+class AppList:
+    '''
+        compact list of every app on the store
+        appids, name offsets and name lengths are arrays, names are one utf-8 blob
+        persisted to a binary index file and shared by every FuzzySearch in the process
+        mapped index files are shared read only by every process, eg:- pre-forked workers
+    '''
+
+    api_url = 'http://api.steampowered.com/ISteamApps/GetAppList/v0001/'
+    # newer endpoint with modified since cursor, requires a web api key
+    store_url = 'https://api.steampowered.com/IStoreService/GetAppList/v1/'
+    path = os.path.join(os.path.expanduser('~'), '.cache', 'steamstorefront', 'applist.idx')
+    max_age = 86400
+    # index files are mapped instead of read into private memory
+    mapped = True
+
+    # magic, version, count, fetched, modified, blob length
+    header = struct.Struct('<4sIIddQ')
+    magic = b'SSFA'
+    version = 3
+
+    # one app object of the GetAppList response
+    pattern = re.compile(r'\{\s*"appid"\s*:\s*(\d+)\s*,\s*"name"\s*:\s*"((?:[^"\\]|\\.)*)"\s*\}')
+    chunk_size = 65536
+    # longest text kept between chunks, far longer than any app object
+    max_object = 4096
+    # seconds before a failed download of a stale list is retried
+    retry_delay = 300
+
+    # (stamp of the list before, updates) of a stale list refreshed by shared instead of downloaded again
+    # indexes built from the list before are updated with it
+    updated = None
+
+    _shared = {}
+    _lock = threading.Lock()
+
+    def __init__(self, appids=None, offsets=None, lengths=None, names=b'', fetched=0, modified=None):
+        self.appids = appids if appids is not None else array.array('I')
+        self.offsets = offsets if offsets is not None else array.array('I')
+        self.lengths = lengths if lengths is not None else array.array('I')
+        self.names = names
+        self.fetched = fetched
+        # apps modified after this unix time are requested by update
+        self.modified = fetched if modified is None else modified
+
+    def __len__(self):
+        return len(self.appids)
+
+    # returns (count, fetched, modified), indexes built from the list are saved with it
+    def stamp(self):
+        return len(self.appids), self.fetched, self.modified
+
+    # returns name at index
+    def name(self, idx):
+        start = self.offsets[idx]
+        return bytes(self.names[start:start + self.lengths[idx]]).decode('utf-8')
+
+    # yields (index, name) for every app
+    def items(self):
+        for idx in range(len(self.appids)):
+            yield idx, self.name(idx)
+
+    # returns true if list is older than max_age seconds
+    def isStale(self, max_age=None):
+        return time.time() - self.fetched > (self.max_age if max_age is None else max_age)
+
+    # builds list from GetAppList apps
+    @classmethod
+    def fromApps(cls, apps, fetched=None):
+        return cls.fromPairs(((app['appid'], app['name']) for app in apps), fetched)
+
+    # builds list from (appid, name) pairs
+    @classmethod
+    def fromPairs(cls, pairs, fetched=None):
+        appids = array.array('I')
+        offsets = array.array('I')
+        lengths = array.array('I')
+        names = bytearray()
+        for appid, name in pairs:
+            name = name.encode('utf-8')
+            appids.append(appid)
+            offsets.append(len(names))
+            lengths.append(len(name))
+            names += name
+        return cls(appids, offsets, lengths, names, fetched or time.time())
+
+    # yields (appid, name) from chunks of GetAppList json without decoding the whole document
+    @classmethod
+    def parse(cls, chunks):
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        buffer = ''
+        for chunk in chunks:
+            buffer += decoder.decode(chunk)
+            end = 0
+            for match in cls.pattern.finditer(buffer):
+                name = match.group(2)
+                # escapes are rare, only those names go through the json decoder
+                yield int(match.group(1)), json.loads('"' + name + '"') if '\\' in name else name
+                end = match.end()
+
+            # keep everything after the last object for the next chunk, the next object may start anywhere in it
+            buffer = buffer[end:][-cls.max_object:]
+
+    # downloads list from GetAppList, streaming the response straight into arrays
+    # returns None if the list did not change since the unix time since
+    # raises requests.HTTPError for error responses, they would parse to an empty list
+    @classmethod
+    def download(cls, session=None, since=None):
+        session = session if session is not None else Session()
+        headers = {'If-Modified-Since': email.utils.formatdate(since, usegmt=True)} if since else None
+        res = session.get(cls.api_url, stream=True, headers=headers)
+        try:
+            if res.status_code == 304:
+                return None
+            if res.status_code != 200:
+                raise requests.HTTPError("GetAppList returned {}.".format(res.status_code), response=res)
+            return cls.fromPairs(cls.parse(res.iter_content(cls.chunk_size)))
+        finally:
+            res.close()
+
+    # yields (appid, name, last modified) of apps changed since modified from IStoreService/GetAppList
+    # raises requests.HTTPError for error responses, eg:- 403 for an invalid key
+    def changes(self, key, session=None, max_results=50000):
+        session = session if session is not None else Session()
+        params = {'key': key, 'if_modified_since': int(self.modified), 'max_results': max_results, 'last_appid': 0,
+                  'include_games': 1, 'include_dlc': 1, 'include_software': 1, 'include_videos': 1,
+                  'include_hardware': 1}
+        while True:
+            res = session.get(self.store_url, params=params)
+            if res.status_code != 200:
+                raise requests.HTTPError("IStoreService/GetAppList returned {}.".format(res.status_code), response=res)
+            response = res.json().get('response', {})
+            for app in response.get('apps', []):
+                yield app['appid'], app['name'], app.get('last_modified', 0)
+            if not response.get('have_more_results'):
+                break
+            params['last_appid'] = response['last_appid']
+
+    # merges apps changed since the last refresh into the list, unchanged if a request fails
+    # returns (index, old name or None, new name) of every added or renamed app
+    def update(self, key, session=None):
+        changed = {}
+        modified = self.modified
+        for appid, name, last_modified in self.changes(key, session):
+            changed[appid] = name
+            modified = max(modified, last_modified)
+
+        updated = []
+        if changed:
+            # mapped arrays are read only, copy them before changing anything
+            if not isinstance(self.appids, array.array):
+                self.appids = array.array('I', self.appids)
+                self.offsets = array.array('I', self.offsets)
+                self.lengths = array.array('I', self.lengths)
+            if not isinstance(self.names, bytearray):
+                self.names = bytearray(self.names)
+
+            # renamed apps get their new name appended, the old bytes are dropped by compact
+            for idx, appid in enumerate(self.appids):
+                if appid in changed:
+                    name = changed.pop(appid)
+                    old = self.name(idx)
+                    if name != old:
+                        self._setName(idx, name)
+                        updated.append((idx, old, name))
+
+            for appid, name in changed.items():
+                self.appids.append(appid)
+                self.offsets.append(0)
+                self.lengths.append(0)
+                self._setName(len(self.appids) - 1, name)
+                updated.append((len(self.appids) - 1, None, name))
+
+        self.fetched = time.time()
+        self.modified = modified
+        return updated
+
+    # appends name to blob and points index at it
+    def _setName(self, idx, name):
+        name = name.encode('utf-8')
+        self.offsets[idx] = len(self.names)
+        self.lengths[idx] = len(name)
+        self.names += name
+
+    # rewrites blob without names replaced by update
+    def compact(self):
+        names = bytearray()
+        for idx in range(len(self.appids)):
+            start = self.offsets[idx]
+            self.offsets[idx] = len(names)
+            names += self.names[start:start + self.lengths[idx]]
+        self.names = names
+
+    # writes index file, replaced atomically so other processes never read a partial file
+    def save(self, path=None):
+        path = path or self.path
+        if len(self.names) > 2 * sum(self.lengths):
+            self.compact()
+
+        writeArrays(path, self.header.pack(self.magic, self.version, len(self.appids), self.fetched, self.modified,
+                                           len(self.names)), (self.appids, self.offsets, self.lengths, self.names))
+
+    # reads index file, mapped files share their pages with every process mapping the same file
+    @classmethod
+    def load(cls, path=None, mapped=None):
+        mapped = cls.mapped if mapped is None else mapped
+        fields, arrays = readArrays(path or cls.path, cls.header, 4, cls.magic, cls.version, mapped)
+        magic, version, count, fetched, modified, size = fields
+        if any(len(values) != count for values in arrays[:3]) or len(arrays[3]) != size:
+            raise ValueError('Truncated app list index.')
+
+        return cls(arrays[0], arrays[1], arrays[2], arrays[3], fetched, modified)
+
+    # returns list shared by every caller in this process
+    # loads index file, downloading and saving a new one if missing or older than max_age
+    # with a web api key stale lists are updated with changed apps instead of downloaded again
+    @classmethod
+    def shared(cls, path=None, max_age=None, session=None, key=None, mapped=None):
+        path = path or cls.path
+        with cls._lock:
+            applist = cls._shared.get(path)
+            if applist is None or applist.isStale(max_age):
+                stale = applist
+                applist = None
+                try:
+                    applist = cls.load(path, mapped)
+                    if applist.isStale(max_age):
+                        stale, applist = applist, None
+                except (OSError, ValueError):
+                    pass
+
+                if applist is None:
+                    updated = None
+                    try:
+                        if stale is not None and key:
+                            updated = (stale.stamp(), stale.update(key, session))
+                            applist = stale
+                        else:
+                            applist = cls.download(session, stale.fetched if stale is not None else None)
+                            # not modified, the stale list is fresh again
+                            if applist is None:
+                                updated = (stale.stamp(), [])
+                                stale.fetched = time.time()
+                                applist = stale
+                    # invalid json raises ValueError with older requests
+                    except (requests.RequestException, ValueError):
+                        if stale is None:
+                            raise
+                        # keep serving the stale list, tried again after retry_delay
+                        stale.fetched = time.time() - (cls.max_age if max_age is None else max_age) + cls.retry_delay
+                        cls._shared[path] = stale
+                        return stale
+
+                    try:
+                        applist.save(path)
+                        # map the saved file so this process shares it too
+                        applist = cls.load(path, mapped)
+                    except (OSError, ValueError):
+                        pass
+                    applist.updated = updated
+
+                cls._shared[path] = applist
+            return applist
@@ -0,0 +1,312 @@
+"""Asyncio client."""
+import asyncio, json
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from .steamstorefront import SteamStoreFront
+from .errors import RateLimited, Errors
+from .ratelimit import RateLimiter
+
+
+class AsyncSteamStoreFront:
+    """
+    :param concurrency: maximum number of requests in flight, defaults to 10
+    :param timeout: total timeout of a request in seconds, defaults to 10
+    :param cache_size: number of entries kept per category in the in-memory cache, defaults to 256
+    :param cache: cache backend shared by all categories, eg:- SQLiteCache(path)
+    :type concurrency: integer
+    :type timeout: integer
+    :type cache_size: integer
+    :type cache: LRUCache or SQLiteCache
+
+    .. note::
+
+        requires aiohttp
+
+        every get function of SteamStoreFront is available as a coroutine with the same arguments
+
+        .. code-block:: python
+
+            async with AsyncSteamStoreFront() as ssf:
+                await ssf.getName(appid=203160, category="app")
+
+    :raise ImportError: if aiohttp is not installed.
+    """
+
+    concurrency = 10
+    timeout = 10
+
+    def __init__(self, **kwargs):
+        if aiohttp is None:
+            raise ImportError("AsyncSteamStoreFront requires aiohttp, install it with pip install aiohttp")
+
+        if "concurrency" in kwargs:
+            self.concurrency = kwargs.pop("concurrency")
+        if "timeout" in kwargs:
+            self.timeout = kwargs.pop("timeout")
+
+        # parsing and caching is shared with the synchronous client
+        self.client = SteamStoreFront(**kwargs)
+        self.limiter = getattr(self.client.session, 'limiter', None) or RateLimiter()
+        self.http = None
+        self.semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        if self.http:
+            await self.http.close()
+            self.http = None
+
+    # returns (status, body, redirected) for url
+    async def _fetch(self, url, cookies=None):
+        # session has to be created inside the running loop
+        if self.http is None:
+            self.http = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.concurrency),
+                                              timeout=aiohttp.ClientTimeout(total=self.timeout),
+                                              headers={'Accept-Encoding': 'gzip, deflate'})
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+
+        # same limits and backoff as the synchronous session
+        attempt = 0
+        while True:
+            wait = self.limiter.reserve(url)
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            async with self.semaphore:
+                async with self.http.get(url, cookies=cookies) as res:
+                    status, body, redirected = res.status, await res.read(), bool(res.history)
+                    retry_after = res.headers.get('Retry-After')
+
+            if not self.limiter.shouldRetry(status):
+                return status, body, redirected
+
+            if attempt >= self.limiter.max_retries:
+                if status == 429:
+                    raise RateLimited("Rate limited by store after {} retries.".format(attempt), url, Errors.RateLimited)
+                return status, body, redirected
+
+            delay = self.limiter.delay(url, attempt, retry_after)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            attempt += 1
+
+    # resolves identifiers, returns kwargs with appid and category
+    async def _resolve(self, kwargs):
+        kwargs = dict(kwargs)
+        # name lookups download the app list, keep them off the loop
+        if "name" in kwargs:
+            client = self.client._clone()
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, lambda: client._populate(**kwargs))
+            kwargs.pop("name")
+        else:
+            client = self.client
+            client._populate(**kwargs)
+        kwargs["appid"] = client.appid
+        kwargs["category"] = client.category
+        return kwargs
+
+    # fetches data into cache if missing, returns cached data
+    async def _prefetch(self, appid, category):
+        if category == "app":
+            module = self.client.app
+        elif category == "sub" or category == "package":
+            module = self.client.package
+        elif category == "bundle":
+            module = self.client.bundle
+        else:
+            return None
+
+        data = module.cache.get(module._key(appid))
+        # bundles may be cached with only some fields
+        if data is not None and not (module is self.client.bundle and module._missing(data)):
+            return data
+
+        if module is self.client.bundle:
+            status, body, redirected = await self._fetch(module.store_url + appid, cookies=module.cookies)
+            return module._parse(appid, body, redirected)
+
+        status, body, redirected = await self._fetch(module._url(appid))
+        if status == 200:
+            return module._parse(appid, json.loads(body))
+        return None
+
+    def getCacheStats(self):
+        """
+            getCacheStats()
+
+            :return: returns hits, misses, size and capacity of the cache for each category
+            :rtype: dictionary
+        """
+
+        return self.client.getCacheStats()
+
+    async def getRaw(self, **kwargs):
+        """
+            getRaw(appid=appid, category=category, name=name, url=url)
+
+            - supported categories = [app, sub, bundle]
+
+            :return: returns raw json data
+            :rtype: dictionary
+        """
+
+        kwargs = await self._resolve(kwargs)
+        return await self._prefetch(kwargs["appid"], kwargs["category"])
+
+    async def getLink(self, **kwargs):
+        """
+            getLink(appid=appid, category=category, name=name, url=url)
+
+            :return: returns store url
+            :rtype: string
+        """
+
+        kwargs = await self._resolve(kwargs)
+        return self.client.getLink(**kwargs)
+
+    async def getPrice(self, **kwargs):
+        """
+            getPrice(appid=appid, category=category, name=name, url=url, currency=currency)
+
+            - supported categories = [app, sub, bundle]
+            - supported categories with currency = [app, sub]
+
+            :return: returns price
+            :rtype: dictionary
+        """
+
+        kwargs = await self._resolve(kwargs)
+        appid, category = kwargs["appid"], kwargs["category"]
+
+        if "currency" in kwargs and category in ("app", "sub", "package"):
+            module = self.client.app if category == "app" else self.client.package
+            status, body, redirected = await self._fetch(module._priceUrl(appid, kwargs["currency"]))
+            return module._getPriceInCurrency(appid, json.loads(body))
+
+        if not await self._prefetch(appid, category):
+            return None
+        return self.client.getPrice(**kwargs)
+
+    async def getPrices(self, ids, currency):
+        """
+            getPrices(ids, currency)
+
+            - same as SteamStoreFront.getPrices, chunks of up to 100 apps are requested concurrently
+
+            :return: returns {id: price}, price is None for free or missing apps
+            :rtype: dictionary
+        """
+
+        prices = self.client.app.prices
+        appids = [str(appid) for appid in ids]
+
+        async def fetch(chunk):
+            status, body, redirected = await self._fetch(prices.api_url.format(currency, ",".join(chunk)))
+            data = json.loads(body) if status == 200 else {}
+            # bad appid lists are answered with null
+            return data if isinstance(data, dict) else {}
+
+        data = {}
+        chunks = [appids[i:i + prices.chunk_size] for i in range(0, len(appids), prices.chunk_size)]
+        for chunk in await asyncio.gather(*(fetch(chunk) for chunk in chunks)):
+            data.update(chunk)
+        return {appid: prices._price(data, str(appid)) for appid in ids}
+
+    async def getPackages(self, **kwargs):
+        """
+            getPackages(appid=appid, category=category, name=name, url=url, details=details, currency=currency)
+
+            - same as SteamStoreFront.getPackages, chunks of up to 100 packages are requested concurrently
+
+            :return: returns packages, or {package id: package data} with details
+            :rtype: list or dictionary
+        """
+
+        kwargs = await self._resolve(kwargs)
+        if kwargs["category"] != "app" or not await self._prefetch(kwargs["appid"], "app"):
+            return None
+
+        packages = self.client.app.getPackages(kwargs["appid"])
+        if packages is None or not kwargs.get("details"):
+            return packages
+
+        module = self.client.package
+        currency = kwargs.get("currency")
+        results, missing = module._cached(packages, currency)
+
+        async def fetch(chunk):
+            status, body, redirected = await self._fetch(module._url(",".join(str(appid) for appid in chunk), currency))
+            module._parseMany(chunk, json.loads(body) if status == 200 else None, currency, results)
+
+        await asyncio.gather(*(fetch(chunk) for chunk in module._chunks(missing)))
+        return results
+
+    async def getRatings(self, **kwargs):
+        """
+            getRatings(appid=appid, category=category, name=name, url=url)
+
+            - supported categories = [app]
+
+            :return: returns (review_score, rating, review_summary)
+            :rtype: tuple
+        """
+
+        kwargs = await self._resolve(kwargs)
+        if kwargs["category"] != "app":
+            return None
+
+        status, body, redirected = await self._fetch(self.client.app._ratingsUrl(kwargs["appid"]))
+        return self.client.app._getRatings(json.loads(body))
+
+    async def getMany(self, ids, fields=None, category="app", **kwargs):
+        """
+            getMany(ids, fields=fields, category=category)
+
+            - same as SteamStoreFront.getMany, requests are bounded by concurrency
+
+            :return: returns {id: {'success': bool, 'data': data, 'error': exception}}
+            :rtype: dictionary
+        """
+
+        async def fetch(appid):
+            if not fields:
+                return await self.getRaw(appid=appid, category=category, **kwargs)
+            return {field: await getattr(self, field)(appid=appid, category=category, **kwargs) for field in fields}
+
+        results = {}
+        outcomes = await asyncio.gather(*(fetch(appid) for appid in ids), return_exceptions=True)
+        for appid, data in zip(ids, outcomes):
+            if isinstance(data, Exception):
+                results[appid] = {'success': False, 'data': None, 'error': data}
+            else:
+                results[appid] = {'success': data is not None, 'data': data, 'error': None}
+        return results
+
+
+# wraps a get function of SteamStoreFront as a coroutine
+def _wrap(name):
+    async def method(self, **kwargs):
+        kwargs = await self._resolve(kwargs)
+        # missing data would make the synchronous client fetch again
+        if not await self._prefetch(kwargs["appid"], kwargs["category"]):
+            return None
+        return getattr(self.client, name)(**kwargs)
+
+    method.__name__ = name
+    method.__doc__ = getattr(SteamStoreFront, name).__doc__
+    return method
+
+
+for _name in dir(SteamStoreFront):
+    if _name.startswith("get") and not hasattr(AsyncSteamStoreFront, _name):
+        setattr(AsyncSteamStoreFront, _name, _wrap(_name))
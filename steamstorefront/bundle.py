@@ -1,13 +1,52 @@
-import requests, re, math, w3lib.html
-from bs4 import BeautifulSoup
+import re, math, hashlib, itertools, w3lib.html
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+from bs4.builder import builder_registry
+from .cache import LRUCache
+from .session import Session
 
 
 class Bundle:
     store_url = "https://store.steampowered.com/bundle/"
     data = {}
     appid = 0
-
-    def _getList(self, text, term, space=None):
+    cookies = {'birthtime': '28801', 'lastagecheckage': '9-1-1991', 'mature_content': '1',
+               'wants_mature_content': '1'}
+    # beautifulsoup tree builder, lxml is several times faster than html5lib when installed
+    parser = 'lxml' if builder_registry.lookup('lxml') else 'html5lib'
+    # classes of the page regions holding each field, in page order
+    regions = (
+        ('pageheader', ('name',)),
+        ('leftcol', ('bundle_id', 'header_image', 'bundle_description', 'price', 'package_item')),
+        ('rightcol', ('genres', 'developers', 'publishers', 'franchise', 'languages', 'drm', 'categories')),
+    )
+    # start of the region after each one, downloads of later regions that are not needed stop there
+    stops = {'pageheader': b'class="leftcol', 'leftcol': b'class="rightcol'}
+    chunk_size = 16384
+    # parts of the page that change between requests without changing any field, ignored by _digest
+    volatile = re.compile(rb'<script\b.*?</script>|\s+', re.S | re.I)
+    # classes read from every package row
+    item_classes = frozenset(('tab_item_name', 'tab_item_overlay', 'tab_item_cap_img', 'discount_block',
+                              'discount_final_price', 'win', 'mac', 'linux', 'tab_item_details'))
+    # parsed pages memoized by digest when no pages cache is passed
+    page_size = 256
+
+    def __init__(self, cache=None, session=None, parser=None, pages=None):
+        self.cache = cache if cache is not None else LRUCache()
+        # kept apart from payloads so memoized pages never evict them, eg:- SQLiteCache(path) to keep them between runs
+        self.pages = pages if pages is not None else LRUCache(self.page_size)
+        self.session = session if session is not None else Session()
+        if parser is not None:
+            if not builder_registry.lookup(parser):
+                raise ValueError("Parser {} is not available.".format(parser))
+            self.parser = parser
+
+    # returns cache key for bundle id
+    def _key(self, appid):
+        return ('bundle', appid, None, None)
+
+    @classmethod
+    def _getList(cls, text, term, space=None):
         temp = text.find(term)
         if not temp:
             return None
@@ -55,43 +94,202 @@ class Bundle:
                     categories (list)
     '''
 
-    # returns raw data
-    def getRaw(self, appid):
+    # returns page regions holding fields, every region if fields is None
+    @classmethod
+    def _regions(cls, fields=None):
+        return [region for region, keys in cls.regions if fields is None or any(field in keys for field in fields)]
+
+    # returns fields of region and every region before it, the ones complete in a download stopped after region
+    @classmethod
+    def _through(cls, region):
+        fields = []
+        for name, keys in cls.regions:
+            fields.extend(keys)
+            if name == region:
+                break
+        return tuple(fields)
+
+    # returns regions holding fields and the region after the last one, where their download stops
+    @classmethod
+    def _required(cls, fields):
+        regions = cls._regions(fields)
+        names = [name for name, keys in cls.regions]
+        return tuple(regions) + (names[names.index(regions[-1]) + 1],)
+
+    # returns true if data is missing any of fields, or any field at all if fields is None
+    def _missing(self, data, fields=None):
+        if fields is None:
+            fields = [key for region, keys in self.regions for key in keys]
+        return any(field not in data for field in fields)
+
+    # returns digest of page without scripts and whitespace
+    @classmethod
+    def _digest(cls, content):
+        return hashlib.sha1(cls.volatile.sub(b' ', content)).hexdigest()
+
+    # returns cache key of details parsed from content, pages that did not change are not parsed again
+    def _pageKey(self, content, fields=None):
+        return ('page', self._digest(content), self.parser, ','.join(self._regions(fields)))
+
+    # returns body of response up to the tag holding stop, the rest is not downloaded
+    def _read(self, res, stop):
+        content = bytearray()
+        found = -1
+        try:
+            for chunk in res.iter_content(self.chunk_size):
+                content += chunk
+                if found == -1:
+                    found = content.find(stop, max(0, len(content) - len(chunk) - len(stop)))
+                # tag of the stop region is read whole so the parsers find it
+                if found != -1 and content.find(b'>', found) != -1:
+                    break
+        finally:
+            res.close()
+        return bytes(content)
+
+    # returns raw data, only the regions up to the last one holding fields if given
+    def getRaw(self, appid, fields=None):
         # caching appid
         self.appid = appid
 
-        cookies = {'birthtime': '28801', 'lastagecheckage': '9-1-1991', 'mature_content': '1',
-                   'wants_mature_content': '1'}
-
+        stop = None
+        if fields is not None:
+            region = self._regions(fields)[-1]
+            stop = self.stops.get(region)
+            required = self._required(fields) if stop is not None else ()
+            # every region before the stop is downloaded whole, parse them all
+            fields = self._through(region) if stop is not None else None
+        res = self.session.get(self.store_url + appid, cookies=self.cookies, stream=stop is not None)
+        if stop is None:
+            return self._parse(appid, res.content, bool(res.history))
+
+        content = self._read(res, stop)
+        details = None
+        if not res.history:
+            details = self._details(content, fields, required)
+            # regions in another order or a stop marker outside the region tag, the page is read whole instead
+            if details is None:
+                res = self.session.get(self.store_url + appid, cookies=self.cookies)
+                return self._parse(appid, res.content, bool(res.history))
+        return self._parse(appid, content, bool(res.history), fields, details)
+
+    # returns details parsed from content, pages that did not change are not parsed again
+    # None if an element of the required regions is not in content
+    def _details(self, content, fields=None, required=()):
+        page = self._pageKey(content, fields)
+        details = self.pages.get(page)
+        if details is None:
+            details = parsePage(content, self.parser, fields, required)
+            if details is not None:
+                self.pages.set(page, details)
+        return details
+
+    # parses bundle page, only the regions holding fields if given, details already parsed are used as is
+    def _parse(self, appid, content, redirected, fields=None, details=None):
         # following steam json format
         data = {}
         data[appid] = {}
         data[appid]['success'] = False
         data[appid]['data'] = {}
 
-        res = requests.get(self.store_url + appid, cookies=cookies)
-
         # checking if bundle exists
         # if bundle does not exist it redirects to store home, thus we check for any redirects
-        if not res.history:
+        if not redirected:
             data[appid]['success'] = True
 
         # if bundle exists procced with parsing
         if data[appid]['success']:
-            details = {}
-            soup = BeautifulSoup(res.content, 'html5lib')
-            # get name of bundle and bundle_id   
+            if details is None:
+                details = self._details(content, fields)
+
+            # fields parsed before are kept
+            if fields is not None:
+                cached = self.cache.get(self._key(appid))
+                if cached is not None:
+                    cached = dict(cached)
+                    cached.update(details)
+                    details = cached
+
+            data[appid]['data'] = details
+
+        # if game exists
+        if data[appid]['success']:
+            self.data = data[appid]['data']
+            self.cache.set(self._key(appid), self.data)
+            return self.data
+        else:
+            return None
+
+    # returns {class: first element with class} of the classes in item_classes under item, in one walk of its tree
+    @classmethod
+    def _itemElements(cls, item):
+        found = {}
+        for element in item.descendants:
+            if isinstance(element, Tag):
+                for name in element.get('class', ()):
+                    if name in cls.item_classes and name not in found:
+                        found[name] = element
+        return found
+
+    # returns package row
+    @classmethod
+    def _parseItem(cls, item):
+        package_item = {}
+        # first element of every class the row is read from, found in one walk
+        found = cls._itemElements(item)
+        package_item['name'] = found['tab_item_name'].text if 'tab_item_name' in found else None
+
+        try:
+            package_item['packageid'] = item.get('data-ds-packageid')
+            package_item['appid'] = item.get('data-ds-appid').split(",")
+            for i in range(len(package_item['appid'])):
+                package_item['appid'][i] = int(package_item['appid'][i])
+        except AttributeError:
+            package_item['appid'] = int(item.get('data-ds-appid'))
+        package_item['app_link'] = found['tab_item_overlay'].get('href') if 'tab_item_overlay' in found else None
+        package_item['app_image'] = found['tab_item_cap_img'].get('src') if 'tab_item_cap_img' in found else None
+
+        # app prices
+        package_item['app_price'] = {}
+        try:
+            package_item['app_price']['final'] = int(found['discount_block'].get('data-price-final'))
+            package_item['app_price']['final_formatted'] = found['discount_final_price'].text
+        except (KeyError, TypeError):
+            package_item['app_price']['final'] = None
+            package_item['app_price']['final_formatted'] = None
+        # platforms
+        package_item['platforms'] = {}
+        package_item['platforms']['windows'] = 'win' in found
+        package_item['platforms']['mac'] = 'mac' in found
+        package_item['platforms']['linux'] = 'linux' in found
+
+        # categories
+        if 'tab_item_details' in found:
+            package_item['categories'] = found['tab_item_details'].text.strip().split(",")
+        else:
+            package_item['categories'] = None
+        return package_item
+
+    # returns details found in regions of soup, in the same order for every subset of regions
+    @classmethod
+    def _parseRegions(cls, soup, regions):
+        details = {}
+        # get name of bundle
+        if 'pageheader' in regions:
             try:
                 details['name'] = soup.find(attrs={'class': 'pageheader'}).get_text()
             except AttributeError as e:
                 details['name'] = None
+        # selecting the correct div
+        leftcol = soup.find('div', {'class':'leftcol'})
+        rightcol = soup.find('div', {'class':'rightcol'})
+
+        # get bundle_id
+        if 'leftcol' in regions:
             try:
                 details['bundle_id'] = soup.find(attrs={'class': 'game_area_purchase_game'}).get('data-ds-bundleid')
             except AttributeError as e:
                 details['bundle_id'] = None
-            # selecting the correct div
-            leftcol = soup.find('div', {'class':'leftcol'})
-            rightcol = soup.find('div', {'class':'rightcol'})
 
             # header image
             if leftcol:
@@ -99,28 +297,29 @@ class Bundle:
                     details['header_image'] = leftcol.find(attrs={'class': 'package_header'}).get('src')
                 except AttributeError as e:
                     details['header_image'] = None
-                    
+                
                 # description
                 try:
                     details['bundle_description'] = leftcol.find(attrs={'class': 'bundle_description'}).find('p').get_text()
                 except AttributeError as e:
                     details['bundle_description'] = None
 
-            # from rightcol
+        # from rightcol
+        if 'rightcol' in regions:
             right_detail = None
             try:
                 right_detail = str(rightcol.findAll('div', {'class':'details_block'})[0])
-            except IndexError as e:
+            except (IndexError, AttributeError) as e:
                 pass
+        
+        
+            details['genres'] = cls._getList(right_detail, 'Genre:') if right_detail else None
+            details['developers'] = cls._getList(right_detail, 'Developer:') if right_detail else None
+            details['publishers'] = cls._getList(right_detail, 'Publisher:') if right_detail else None
+            details['franchise'] = cls._getList(right_detail, 'Franchise:') if right_detail else None
+            details['languages'] = cls._getList(right_detail, 'Languages:') if right_detail else None
+            details['drm'] = cls._getList(right_detail, 'DRM:', 'space') if right_detail else None
             
-            
-            details['genres'] = self._getList(right_detail, 'Genre:') if right_detail else None
-            details['developers'] = self._getList(right_detail, 'Developer:') if right_detail else None
-            details['publishers'] = self._getList(right_detail, 'Publisher:') if right_detail else None
-            details['franchise'] = self._getList(right_detail, 'Franchise:') if right_detail else None
-            details['languages'] = self._getList(right_detail, 'Languages:') if right_detail else None
-            details['drm'] = self._getList(right_detail, 'DRM:', 'space') if right_detail else None
-                
 
             details['categories'] = []
             try:
@@ -133,27 +332,28 @@ class Bundle:
             except AttributeError as e:
                 details['categories'] = None
 
-            # prices
+        # prices and package items
+        if 'leftcol' in regions:
             details['price'] = {}
             details['price']['initial'] = 0
             try:
                 details['price']['final'] = int(leftcol.select('.discount_block')[0].get('data-price-final'))
-            except (IndexError, TypeError):
+            except (IndexError, TypeError, AttributeError):
                 details['price']['final'] = None
-                
+            
             try:
                 details['price']['discount_percent'] = int(re.findall(r'\d+',leftcol.select('.bundle_base_discount')[0].text)[0])
-            except (IndexError, TypeError):
+            except (IndexError, TypeError, AttributeError):
                 details['price']['discount_percent'] = None
-            
+        
             try:
                 details['price']['initial_formatted'] = leftcol.select('.bundle_final_package_price')[0].text
-            except (IndexError, TypeError):
+            except (IndexError, TypeError, AttributeError):
                 details['price']['initial_formatted'] = None
-            
+        
             try:
                 details['price']['final_formatted'] = leftcol.select('.discount_final_price')[0].text
-            except (IndexError, TypeError):
+            except (IndexError, TypeError, AttributeError):
                 details['price']['final_formatted'] = None
             if details['price']['final'] is not None and details['price']['discount_percent'] is not None:
                 details['price']['initial'] = math.ceil((details['price']['final']/100)/((100-details['price']['discount_percent'])/100))*100
@@ -163,123 +363,158 @@ class Bundle:
             details['package_item'] = []
             try:
                 for item in leftcol.findAll('div', {'class':'tab_item'}):
-                    package_item = {}
-                    try:
-                        package_item['name'] = item.select('.tab_item_name')[0].text
-                    except IndexError:
-                        package_item['name'] = None
-                        
-                    try:
-                        package_item['packageid'] = item.get('data-ds-packageid')
-                        package_item['appid'] = item.get('data-ds-appid').split(",")
-                        for i in range(len(package_item['appid'])):
-                            package_item['appid'][i] = int(package_item['appid'][i])
-                    except AttributeError:
-                        package_item['appid'] = int(item.get('data-ds-appid'))
-                    try:
-                        package_item['app_link'] = item.select('.tab_item_overlay')[0].get('href')
-                    except IndexError:
-                        package_item['app_link'] = None
-                    try:
-                        package_item['app_image'] = item.select('.tab_item_cap_img')[0].get('src')
-                    except IndexError:
-                        package_item['app_image'] = None
-
-                    # app prices
-                    package_item['app_price'] = {}
-                    try:
-                        package_item['app_price']['final'] = int(item.select('.discount_block')[0].get('data-price-final'))
-                        package_item['app_price']['final_formatted'] = item.select('.discount_final_price')[0].text
-                    except (IndexError, TypeError):
-                        package_item['app_price']['final'] = None
-                        package_item['app_price']['final_formatted'] = None
-                    # platforms
-                    package_item['platforms'] = {}
-                    package_item['platforms']['windows'] = True if item.select('.win') else False
-                    package_item['platforms']['mac'] = True if item.select('.mac') else False
-                    package_item['platforms']['linux'] = True if item.select('.linux') else False
-
-                    # categories
-                    try:
-                        package_item['categories'] = item.select('.tab_item_details')[0].text.strip().split(",")
-                    except IndexError:
-                        package_item['categories'] = None
-                        
-                    details['package_item'].append(package_item)
+                    details['package_item'].append(cls._parseItem(item))
 
             except AttributeError:
                 details['package_item'] = None
 
-            data[appid]['data'] = details
-
-        # if game exists
-        if data[appid]['success']:
-            self.data = data[appid]['data']
-            return self.data
-        else:
-            return None
-
-    # populate internal data dictionary
-    def _populate(self, appid):
-        if not self.data or appid != self.appid or self.appid == 0:
-            self.getRaw(appid)
+        return details
+
+    # populate internal data dictionary from cache, only the regions holding fields are fetched if missing
+    # partial entries are completed with the whole page, a bundle takes at most 2 requests
+    # returns data or None if the bundle does not exist
+    def _populate(self, appid, fields=None):
+        data = self.cache.get(self._key(appid))
+        if data is None:
+            data = self.getRaw(appid, fields)
+        elif self._missing(data, fields):
+            data = self.getRaw(appid)
+        self.appid = appid
+        self.data = data if data is not None else {}
+        return data
+
+    # returns (content, redirected) of bundle page
+    def _fetch(self, appid):
+        res = self.session.get(self.store_url + appid, cookies=self.cookies)
+        return res.content, bool(res.history)
+
+    # yields (appid, {'success': bool, 'data': data, 'error': exception}) in completion order
+    # pages are downloaded by threads and parsed by a pool of processes, parsing scales with cores
+    def crawl(self, appids, processes=None, threads=8):
+        appids = (str(appid) for appid in appids)
+        with ThreadPoolExecutor(max_workers=threads) as downloads, \
+                ProcessPoolExecutor(max_workers=processes) as parsers:
+            fetching = {}
+            parsing = {}
+            while True:
+                # keeps a bounded number of pages in memory
+                taken = 0
+                for appid in itertools.islice(appids, max(0, 2 * threads - len(fetching) - len(parsing))):
+                    taken += 1
+                    data = self.cache.get(self._key(appid))
+                    if data is not None and not self._missing(data):
+                        yield appid, {'success': True, 'data': data, 'error': None}
+                    else:
+                        fetching[downloads.submit(self._fetch, appid)] = appid
+                if not fetching and not parsing:
+                    if taken:
+                        continue
+                    break
+
+                done, running = wait(list(fetching) + list(parsing), return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in fetching:
+                        appid = fetching.pop(future)
+                        try:
+                            content, redirected = future.result()
+                        except Exception as e:
+                            yield appid, {'success': False, 'data': None, 'error': e}
+                            continue
+                        # bundle does not exist
+                        if redirected:
+                            yield appid, {'success': False, 'data': None, 'error': None}
+                            continue
+                        # unchanged pages are not parsed again
+                        page = self._pageKey(content)
+                        data = self.pages.get(page)
+                        if data is not None:
+                            self.cache.set(self._key(appid), data)
+                            yield appid, {'success': True, 'data': data, 'error': None}
+                        else:
+                            parsing[parsers.submit(parsePage, content, self.parser)] = (appid, page)
+                    else:
+                        appid, page = parsing.pop(future)
+                        try:
+                            data = future.result()
+                        except Exception as e:
+                            yield appid, {'success': False, 'data': None, 'error': e}
+                            continue
+                        self.pages.set(page, data)
+                        self.cache.set(self._key(appid), data)
+                        yield appid, {'success': True, 'data': data, 'error': None}
 
     # returns name
     def getName(self, appid):
-        self._populate(appid)
+        self._populate(appid, ('name',))
         return self.data['name'] if 'name' in self.data else None
 
     # returns header image
     def getHeaderImage(self, appid):
-        self._populate(appid)
+        self._populate(appid, ('header_image',))
         return self.data['header_image'] if 'header_image' in self.data else None
 
     # returns bundle description
     def getBundleDescription(self, appid):
-        self._populate(appid)
+        self._populate(appid, ('bundle_description',))
         return self.data['bundle_description'] if 'bundle_description' in self.data else None
 
     # returns genre
     def getGenres(self, appid):
-        self._populate(appid)
+        self._populate(appid, ('genres',))
         return self.data['genres'] if 'genres' in self.data else None
 
     # returns developer
     def getDevelopers(self, appid):
-        self._populate(appid)
+        self._populate(appid, ('developers',))
         return self.data['developers'] if 'developers' in self.data else None
 
     # returns publisher
     def getPublishers(self, appid):
-        self._populate(appid)
+        self._populate(appid, ('publishers',))
         return self.data['publishers'] if 'publishers' in self.data else None
 
     # returns franchise
     def getFranchise(self, appid):
-        self._populate(appid)
+        self._populate(appid, ('franchise',))
         return self.data['franchise'] if 'franchise' in self.data else None
 
     # returns languages
     def getLanguages(self, appid):
-        self._populate(appid)
+        self._populate(appid, ('languages',))
         return self.data['languages'] if 'languages' in self.data else None
 
     # returns drm
     def getDRM(self, appid):
-        self._populate(appid)
+        self._populate(appid, ('drm',))
         return self.data['drm'] if 'drm' in self.data else None
 
     # returns categories
     def getCategories(self, appid):
-        self._populate(appid)
+        self._populate(appid, ('categories',))
         return self.data['categories'] if 'categories' in self.data else None
 
     # returns price
     def getPrice(self, appid):
-        self._populate(appid)
+        self._populate(appid, ('price',))
         return self.data['price'] if 'price' in self.data else None
 
     # returns package items
     def getPackageItem(self, appid):
-        self._populate(appid)
+        self._populate(appid, ('package_item',))
         return self.data['package_item'] if 'package_item' in self.data else None
+
+
+# returns details of a bundle page, only the regions holding fields if given
+# None if an element of the required regions is not found, eg:- a page cut short before them
+# module level so bundle crawls can run it in worker processes
+def parsePage(content, parser=None, fields=None, required=()):
+    parser = parser or Bundle.parser
+    regions = Bundle._regions(fields)
+    # html5lib always builds the whole tree
+    strainer = None
+    if fields is not None and parser != 'html5lib':
+        strainer = SoupStrainer(attrs={'class': sorted(set(regions) | set(required))})
+    soup = BeautifulSoup(content, parser, parse_only=strainer)
+    if any(soup.find(attrs={'class': region}) is None for region in required):
+        return None
+    return Bundle._parseRegions(soup, regions)
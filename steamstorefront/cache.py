@@ -0,0 +1,160 @@
+import collections, pickle, sqlite3, threading, time
+
+
+class LRUCache:
+    '''
+        bounded in-memory cache with least recently used eviction
+        keys are tuples of (category, id, currency, language)
+    '''
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    # returns cached value or None
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    # stores value, evicting least recently used entries when full
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+
+    # stores value in place of an existing entry, keeping its place in eviction order
+    def replace(self, key, value):
+        with self._lock:
+            if key in self._data:
+                self._data[key] = value
+
+    # removes a single entry
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    # removes every entry and resets counters
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    # returns hit and miss counters
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data), 'capacity': self.capacity}
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache:
+    '''
+        persistent cache stored in a sqlite database
+        same interface as LRUCache, entries expire after the ttl of their category
+        payloads are pickled so bundle dicts with integer keys round trip unchanged
+    '''
+
+    # seconds entries of each category are kept, parsed bundle pages are keyed by a digest of their content
+    # http entries are bodies and validators of responses for conditional requests
+    ttl = {'app': 86400, 'package': 86400, 'bundle': 604800, 'page': 2592000, 'http': 2592000}
+
+    def __init__(self, path, ttl=None):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        if ttl:
+            self.ttl = dict(self.ttl, **ttl)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS payload ('
+                           'category TEXT, id TEXT, currency TEXT, language TEXT, data BLOB, fetched REAL, '
+                           'PRIMARY KEY (category, id, currency, language))')
+        self._conn.commit()
+
+    # sqlite treats NULLs as distinct in primary keys
+    def _row(self, key):
+        return tuple('' if part is None else str(part) for part in key)
+
+    # returns cached value or None if missing or expired
+    def get(self, key):
+        row = self._row(key)
+        with self._lock:
+            cur = self._conn.execute('SELECT data, fetched FROM payload '
+                                     'WHERE category=? AND id=? AND currency=? AND language=?', row)
+            result = cur.fetchone()
+            if result and time.time() - result[1] <= self.ttl.get(row[0], 0):
+                self.hits += 1
+                return pickle.loads(result[0])
+            self.misses += 1
+            return None
+
+    # stores value with current timestamp
+    def set(self, key, value):
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO payload VALUES (?, ?, ?, ?, ?, ?)',
+                               self._row(key) + (pickle.dumps(value), time.time()))
+            self._conn.commit()
+
+    # stores value in place of an existing entry, keeping its timestamp so it expires as fetched
+    def replace(self, key, value):
+        with self._lock:
+            self._conn.execute('UPDATE payload SET data=? WHERE category=? AND id=? AND currency=? AND language=?',
+                               (pickle.dumps(value),) + self._row(key))
+            self._conn.commit()
+
+    # removes a single entry
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute('DELETE FROM payload WHERE category=? AND id=? AND currency=? AND language=?',
+                               self._row(key))
+            self._conn.commit()
+
+    # removes every entry and resets counters
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM payload')
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    # removes expired entries
+    def purge(self):
+        now = time.time()
+        with self._lock:
+            for category, ttl in self.ttl.items():
+                self._conn.execute('DELETE FROM payload WHERE category=? AND fetched<?', (category, now - ttl))
+            self._conn.commit()
+
+    # returns hit and miss counters
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self), 'path': self.path}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __contains__(self, key):
+        with self._lock:
+            cur = self._conn.execute('SELECT 1 FROM payload WHERE category=? AND id=? AND currency=? AND language=?',
+                                     self._row(key))
+            return cur.fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM payload').fetchone()[0]
@@ -11,6 +11,8 @@ class Errors(enum.Enum):
     InvalidUrl = 2
     InvalidName = 3
     InvalidAppId = 4
+    RateLimited = 5
+    AppsLoading = 6
 
 
 class InvalidArgument(SteamStoreFront):
@@ -18,3 +20,17 @@ class InvalidArgument(SteamStoreFront):
         super().__init__(message)
         self.error = error
         self.type = type_e
+
+
+class RateLimited(SteamStoreFront):
+    def __init__(self, message, url, type_e):
+        super().__init__(message)
+        self.url = url
+        self.type = type_e
+
+
+class AppsLoading(SteamStoreFront):
+    def __init__(self, message, name, type_e):
+        super().__init__(message)
+        self.name = name
+        self.type = type_e
@@ -1,26 +1,290 @@
+import threading
 from fuzzywuzzy import process
-import requests
+from .applist import AppList
+from .errors import AppsLoading, Errors
+from .nameindex import NameIndex, PrefixIndex, TrigramIndex, normalize, loadIndexes, saveIndexes
+from .session import Session
+
+try:
+    from rapidfuzz import fuzz as rapidfuzz_fuzz, process as rapidfuzz_process, utils as rapidfuzz_utils
+except ImportError:
+    rapidfuzz_process = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class FuzzySearch:
-    json = None
-    indexed = None
+    applist = None
+    names = None
+    trigrams = None
+    # built on first complete, names and word starts sorted for prefix lookups
+    prefixes = None
+    candidates = 300
+    # queries scored together by resolveMany, bounds the score matrix to chunk_size x apps bytes
+    chunk_size = 256
+    # background thread started by warm
+    loader = None
+
+    # name and trigram indexes of shared app lists, saved next to the app list and mapped like it
+    _shared = {}
+    _lock = threading.Lock()
+
+    def __init__(self, session=None, applist=None, path=None, max_age=None, prefer=None, key=None):
+        self.session = session if session is not None else Session()
+        self.applist = applist
+        # lists from AppList.shared are looked up again on every call to pick up refreshed files
+        self.shared = applist is None
+        self.path = path
+        self.max_age = max_age
+        # web api key, enables refreshing only changed apps
+        self.key = key
+        # prefer(appid) returns true for the app to pick among duplicate names
+        self.prefer = prefer
+        # set once the indexes are built by warm
+        self.ready = threading.Event()
+
+    # loads app list and builds indexes in a background thread, returns the readiness event
+    def warm(self):
+        with self._lock:
+            if self.loader is None:
+                self.loader = threading.Thread(target=self._warm, name='steamstorefront-warm', daemon=True)
+                self.loader.start()
+        return self.ready
+
+    def _warm(self):
+        try:
+            self._populate(None)
+        except Exception:
+            # lookups populate again and raise the error themselves
+            pass
+        finally:
+            self.ready.set()
+
+    # waits for warm up, returns false if indexes are still loading after timeout seconds
+    def wait(self, timeout=None):
+        if self.loader is None:
+            return True
+        return self.ready.wait(timeout)
 
     def _populate(self, name):
-        if not self.json and not self.indexed:
-            self.json = requests.get('http://api.steampowered.com/ISteamApps/GetAppList/v0001/').json()
-        if not self.indexed:
-            self.indexed = {idx: k["name"] for idx, k in enumerate(self.json["applist"]["apps"]["app"])}
+        # lookups during warm up wait for the loader instead of building the indexes twice
+        if self.loader is not None and threading.current_thread() is not self.loader:
+            self.ready.wait()
+
+        # app list is loaded once per process and shared
+        if self.shared:
+            applist = AppList.shared(self.path, self.max_age, self.session, self.key)
+            if applist is not self.applist:
+                self.applist, self.names, self.trigrams, self.prefixes = applist, None, None, None
+        if self.names is None or self.trigrams is None:
+            if self.shared:
+                self.names, self.trigrams = self._sharedIndexes()
+            else:
+                self.names, self.trigrams = self._build()
+
+    # returns (name index, trigram index) built from the app list
+    def _build(self):
+        normalized = [normalize(name) for idx, name in self.applist.items()]
+        return NameIndex.build(enumerate(normalized)), TrigramIndex.build(enumerate(normalized))
+
+    # returns path of the index file saved next to the app list
+    def _indexPath(self):
+        return (self.path or AppList.path) + '.search'
+
+    # returns indexes shared by every caller in this process, loaded from the index file if it matches the app list
+    def _sharedIndexes(self):
+        path = self._indexPath()
+        with self._lock:
+            shared = self._shared.get(path)
+            if shared is not None and shared[0] is self.applist:
+                return shared[1:]
+
+            try:
+                names, trigrams = loadIndexes(path, self.applist, AppList.mapped)
+            except (OSError, ValueError):
+                # lists refreshed with changed apps update the indexes of the list before, callers still
+                # holding that list keep their indexes unchanged
+                updated = self.applist.updated
+                if shared is not None and updated is not None and updated[0] == shared[0].stamp():
+                    names, trigrams = shared[1].copy(), shared[2].copy()
+                    self._add(names, trigrams, updated[1])
+                    names.merge()
+                    trigrams.merge()
+                else:
+                    names, trigrams = self._build()
+                try:
+                    saveIndexes(path, self.applist, names, trigrams)
+                    names, trigrams = loadIndexes(path, self.applist, AppList.mapped)
+                except (OSError, ValueError):
+                    pass
+
+            self._shared[path] = (self.applist, names, trigrams)
+            return names, trigrams
+
+    # adds names of (index, old name or None, new name) updates to the indexes
+    @staticmethod
+    def _add(names, trigrams, updated):
+        for idx, old, name in updated:
+            normalized = normalize(name)
+            names.add(idx, normalized)
+            trigrams.add(idx, normalized)
+
+    # returns normalized name at index, drops stale entries from name lookups
+    def _normalized(self, idx):
+        return normalize(self.applist.name(idx))
+
+    # merges apps changed since the last refresh into the app list and the name indexes
+    # returns number of added or renamed apps
+    def refresh(self, key=None):
+        self._populate(None)
+
+        updated = self.applist.update(key or self.key, self.session)
+        self._add(self.names, self.trigrams, updated)
+        # renamed entries would break the sort order, rebuilt on next complete
+        if updated:
+            self.prefixes = None
+
+        # other processes load the updated indexes instead of building their own
+        # added names are merged into the saved arrays, the catalog is not normalized again
+        # lists passed in are only saved to a path given for them
+        if self.shared or self.path:
+            try:
+                self.applist.save(self.path)
+                if self.shared:
+                    self.names.merge()
+                    self.trigrams.merge()
+                    saveIndexes(self._indexPath(), self.applist, self.names, self.trigrams)
+            except OSError:
+                pass
+        return len(updated)
+
+    # returns index among duplicate names, lowest appid unless another one is preferred
+    # prefer may request every candidate, batches pass prefer=False
+    def _choose(self, indexes, prefer=True):
+        indexes = sorted(indexes, key=lambda idx: self.applist.appids[idx])
+        if len(indexes) > 1 and prefer and self.prefer is not None:
+            for idx in indexes:
+                if self.prefer(self.applist.appids[idx]):
+                    return idx
+        return indexes[0]
+
+    # returns appid of the app named exactly name, used while indexes are still loading
+    # raises AppsLoading if the app list itself is still downloading, the app may well exist
+    def _exact(self, name):
+        applist = self.applist
+        if applist is None:
+            raise AppsLoading("App list is still loading, {} can not be looked up yet.".format(name), name,
+                              Errors.AppsLoading)
+        encoded = name.encode('utf-8')
+        size = len(encoded)
+        indexes = [idx for idx, length in enumerate(applist.lengths) if length == size and
+                   applist.names[applist.offsets[idx]:applist.offsets[idx] + size] == encoded]
+        return applist.appids[self._choose(indexes)] if indexes else None
+
+    # timeout is seconds to wait for warm up, exact names are still found after it once the app list is loaded
+    def getAppID(self, name, timeout=None):
+        if not self.wait(timeout):
+            return self._exact(name)
 
-    def getAppID(self, name):
         # populate it
         self._populate(name)
 
+        # exact and normalized names need no scoring
+        indexes = self.names.lookup(name, self._normalized)
+        if indexes:
+            return self.applist.appids[self._choose(indexes)]
+
+        # only names sharing trigrams with the query are scored
+        choices = {idx: self.applist.name(idx) for idx in self.trigrams.candidates(name, self.candidates)}
+
         # extract the one with best match
-        tup = process.extractOne(name, dict)
+        tup = process.extractOne(name, choices) if choices else None
 
         # return if found else return None
         if tup:
-            return self.json["applist"]["apps"]["app"][tup[2]]["appid"]
+            return self.applist.appids[tup[2]]
         else:
             return None
+
+    # returns up to limit (appid, name) of apps whose name or a word of it starts with prefix
+    # rank(appid) is a popularity score, more popular apps first
+    def complete(self, prefix, limit=10, rank=None):
+        self._populate(prefix)
+
+        prefixes = self.prefixes
+        if prefixes is None:
+            with self._lock:
+                if self.prefixes is None:
+                    self.prefixes = PrefixIndex.build([normalize(name) for idx, name in self.applist.items()])
+                prefixes = self.prefixes
+
+        appids = self.applist.appids
+        indexes = prefixes.lookup(prefix, limit, None if rank is None else lambda idx: rank(appids[idx]))
+        return [(appids[idx], self.applist.name(idx)) for idx in indexes]
+
+    # returns up to k (appid, name, score) tuples, best match first
+    def search(self, name, k=10):
+        self._populate(name)
+
+        results = []
+        exact = sorted(self.names.lookup(name, self._normalized), key=lambda idx: self.applist.appids[idx])
+        for idx in exact:
+            results.append((self.applist.appids[idx], self.applist.name(idx), 100))
+
+        choices = {idx: self.applist.name(idx) for idx in self.trigrams.candidates(name, max(self.candidates, k))
+                   if idx not in exact}
+        for choice, score, idx in process.extract(name, choices, limit=k) if choices else ():
+            results.append((self.applist.appids[idx], choice, score))
+
+        return results[:k]
+
+    # returns (appid, name, score) of the best match for every name, None if nothing matches
+    # workers is the number of threads used by the rapidfuzz matrix scorer, -1 uses every core
+    # duplicate names resolve to the lowest appid, prefer would request details of every duplicate
+    def resolveMany(self, names, workers=1):
+        self._populate(None)
+
+        results = [None] * len(names)
+        pending = []
+        for i, name in enumerate(names):
+            indexes = self.names.lookup(name, self._normalized)
+            if indexes:
+                idx = self._choose(indexes, prefer=False)
+                results[i] = (self.applist.appids[idx], self.applist.name(idx), 100)
+            else:
+                pending.append(i)
+
+        if pending:
+            choices = [name for idx, name in self.applist.items()]
+            queries = [names[i] for i in pending]
+            for i, (idx, score) in zip(pending, self._scoreMany(queries, choices, workers)):
+                if idx is not None:
+                    results[i] = (self.applist.appids[idx], choices[idx], score)
+
+        return results
+
+    # returns (index, score) of best choice for every query
+    def _scoreMany(self, queries, choices, workers):
+        if rapidfuzz_process is None:
+            indexed = dict(enumerate(choices))
+            matches = (process.extractOne(query, indexed) for query in queries)
+            return [(tup[2], tup[1]) if tup else (None, 0) for tup in matches]
+
+        scorer = rapidfuzz_fuzz.WRatio
+        processor = rapidfuzz_utils.default_process
+        if numpy is None:
+            matches = (rapidfuzz_process.extractOne(query, choices, scorer=scorer, processor=processor) for query in queries)
+            return [(tup[2], round(tup[1])) if tup else (None, 0) for tup in matches]
+
+        # one score matrix per chunk of queries, scored in parallel by rapidfuzz
+        best = []
+        for start in range(0, len(queries), self.chunk_size):
+            matrix = rapidfuzz_process.cdist(queries[start:start + self.chunk_size], choices, scorer=scorer,
+                                             processor=processor, dtype=numpy.uint8, workers=workers)
+            for row in matrix:
+                idx = int(row.argmax())
+                best.append((idx, int(row[idx])) if row[idx] else (None, 0))
+        return best
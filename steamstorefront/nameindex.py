@@ -0,0 +1,341 @@
+import array, bisect, collections, hashlib, heapq, re, struct, unicodedata
+from .storage import readArrays, writeArrays
+
+symbols = re.compile(r'[™®©]')
+nonascii = re.compile(r'[^\x00-\x7f]')
+punctuation = re.compile(r'[^\w\s]|_')
+editions = re.compile(r' (?:(?:game of the year|goty|definitive|deluxe|digital deluxe|complete|gold|ultimate|special|'
+                      r'collectors|enhanced|anniversary|standard|premium)(?: edition)?|\w+ edition)$')
+
+
+# lowercases, strips accents, trademark symbols and punctuation
+def normalize(name):
+    # most names are ascii and have nothing to decompose
+    if nonascii.search(name):
+        name = symbols.sub('', name)
+        name = unicodedata.normalize('NFKD', name)
+        name = ''.join(c for c in name if not unicodedata.combining(c))
+    name = name.lower()
+    return ' '.join(punctuation.sub(' ', name).split())
+
+
+# removes edition suffix from normalized name
+def stripEdition(name):
+    return editions.sub('', name)
+
+
+# returns 64 bit hash of normalized name, the same in every process
+def nameHash(name):
+    return int.from_bytes(hashlib.sha1(name.encode('utf-8')).digest()[:8], 'little')
+
+
+# returns set of trigrams of normalized name packed as integers
+def trigrams(name):
+    name = ' ' + name + ' '
+    return {(ord(name[i]) << 42) | (ord(name[i + 1]) << 21) | ord(name[i + 2]) for i in range(len(name) - 2)}
+
+
+class TrigramIndex:
+    '''
+        inverted index from trigram to indexes of app names containing it
+        keys are sorted, postings of keys[i] are postings[starts[i]:starts[i + 1]]
+        sizes[idx] is the number of trigrams of name at idx
+    '''
+
+    # trigrams in more than this share of names are skipped when rarer ones exist
+    common = 0.05
+
+    def __init__(self, keys=None, starts=None, postings=None, sizes=None):
+        self.keys = keys if keys is not None else array.array('Q')
+        self.starts = starts if starts is not None else array.array('I', [0])
+        self.postings = postings if postings is not None else array.array('I')
+        self.sizes = sizes if sizes is not None else array.array('I')
+        # postings of names added after build
+        self.added = {}
+
+    # returns index sharing the sorted arrays, names added to the copy leave this one unchanged
+    def copy(self):
+        index = TrigramIndex(self.keys, self.starts, self.postings, array.array('I', self.sizes))
+        index.added = {key: list(postings) for key, postings in self.added.items()}
+        return index
+
+    # builds index from (index, normalized name) pairs, indexes have to be 0 to n - 1 in order
+    @classmethod
+    def build(cls, names):
+        table = {}
+        sizes = array.array('I')
+        for idx, name in names:
+            keys = trigrams(name)
+            sizes.append(len(keys))
+            for key in keys:
+                if key not in table:
+                    table[key] = array.array('I')
+                table[key].append(idx)
+
+        keys = array.array('Q', sorted(table))
+        starts = array.array('I', [0])
+        postings = array.array('I')
+        for key in keys:
+            postings.extend(table.pop(key))
+            starts.append(len(postings))
+        return cls(keys, starts, postings, sizes)
+
+    # adds or replaces normalized name at index, old postings of a replaced name stay until rebuild
+    def add(self, idx, name):
+        keys = trigrams(name)
+        # mapped sizes are read only
+        if not isinstance(self.sizes, array.array):
+            self.sizes = array.array('I', self.sizes)
+        if idx < len(self.sizes):
+            self.sizes[idx] = len(keys)
+        else:
+            self.sizes.append(len(keys))
+        for key in keys:
+            self.added.setdefault(key, []).append(idx)
+
+    # folds postings added after build into the sorted arrays, unchanged keys are copied in bulk
+    def merge(self):
+        if not self.added:
+            return
+        keys = array.array('Q')
+        starts = array.array('I', [0])
+        postings = array.array('I')
+        previous = 0
+        for key in sorted(self.added):
+            i = bisect.bisect_left(self.keys, key)
+            self._copy(keys, starts, postings, previous, i)
+            keys.append(key)
+            if i < len(self.keys) and self.keys[i] == key:
+                postings.frombytes(memoryview(self.postings)[self.starts[i]:self.starts[i + 1]].tobytes())
+                i += 1
+            postings.extend(self.added[key])
+            starts.append(len(postings))
+            previous = i
+        self._copy(keys, starts, postings, previous, len(self.keys))
+        self.keys, self.starts, self.postings = keys, starts, postings
+        self.added = {}
+
+    # appends keys[start:end] and their postings to the new arrays
+    def _copy(self, keys, starts, postings, start, end):
+        if start >= end:
+            return
+        shift = len(postings) - self.starts[start]
+        keys.frombytes(memoryview(self.keys)[start:end].tobytes())
+        postings.frombytes(memoryview(self.postings)[self.starts[start]:self.starts[end]].tobytes())
+        starts.extend(offset + shift for offset in self.starts[start + 1:end + 1])
+
+    # returns indexes of names containing trigram
+    def lookup(self, key):
+        postings = ()
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            postings = self.postings[self.starts[i]:self.starts[i + 1]]
+        if key in self.added:
+            postings = list(postings) + self.added[key]
+        return postings
+
+    # returns up to limit indexes most similar to name by shared trigrams
+    def candidates(self, name, limit=300):
+        keys = trigrams(normalize(name))
+        lists = [self.lookup(key) for key in keys]
+        lists = [postings for postings in lists if len(postings)]
+        rare = [postings for postings in lists if len(postings) <= self.common * len(self.sizes)]
+        if rare:
+            lists = rare
+
+        counts = collections.Counter()
+        for postings in lists:
+            counts.update(postings)
+
+        # jaccard similarity so short exact names beat long names containing them
+        sizes = self.sizes
+        query = len(keys)
+        scored = heapq.nlargest(limit, counts.items(), key=lambda item: item[1] / (query + sizes[item[0]] - item[1]))
+        return [idx for idx, shared in scored]
+
+
+class NameIndex:
+    '''
+        normalized name to indexes of apps, as sorted 64 bit name hashes with parallel indexes
+        names with an edition suffix are also reachable without it
+        names added after build are kept in dicts, replaced names are dropped by the verify callback of lookup
+    '''
+
+    def __init__(self, hashes=None, indexes=None, bases=None, base_indexes=None):
+        self.hashes = hashes if hashes is not None else array.array('Q')
+        self.indexes = indexes if indexes is not None else array.array('I')
+        self.bases = bases if bases is not None else array.array('Q')
+        self.base_indexes = base_indexes if base_indexes is not None else array.array('I')
+        self.added = {}
+        self.added_base = {}
+
+    # returns index sharing the sorted arrays, names added to the copy leave this one unchanged
+    def copy(self):
+        index = NameIndex(self.hashes, self.indexes, self.bases, self.base_indexes)
+        index.added = {name: list(found) for name, found in self.added.items()}
+        index.added_base = {name: list(found) for name, found in self.added_base.items()}
+        return index
+
+    # builds index from (index, normalized name) pairs
+    @classmethod
+    def build(cls, names):
+        exact = []
+        base = []
+        for idx, name in names:
+            exact.append((nameHash(name), idx))
+            stripped = stripEdition(name)
+            if stripped != name:
+                base.append((nameHash(stripped), idx))
+        exact.sort()
+        base.sort()
+        return cls(array.array('Q', (h for h, idx in exact)), array.array('I', (idx for h, idx in exact)),
+                   array.array('Q', (h for h, idx in base)), array.array('I', (idx for h, idx in base)))
+
+    # adds normalized name at index
+    def add(self, idx, name):
+        self.added.setdefault(name, []).append(idx)
+        stripped = stripEdition(name)
+        if stripped != name:
+            self.added_base.setdefault(stripped, []).append(idx)
+
+    # folds names added after build into the sorted arrays, replaced names stay until rebuild
+    def merge(self):
+        if not self.added and not self.added_base:
+            return
+        self.hashes, self.indexes = self._merge(self.hashes, self.indexes, self.added)
+        self.bases, self.base_indexes = self._merge(self.bases, self.base_indexes, self.added_base)
+        self.added = {}
+        self.added_base = {}
+
+    # returns (hashes, indexes) with entries of added merged in sort order
+    @staticmethod
+    def _merge(hashes, indexes, added):
+        entries = sorted((nameHash(name), idx) for name, found in added.items() for idx in found)
+        merged = list(heapq.merge(zip(hashes, indexes), entries))
+        return array.array('Q', (h for h, idx in merged)), array.array('I', (idx for h, idx in merged))
+
+    # returns indexes stored under key
+    def _find(self, hashes, indexes, added, key):
+        found = []
+        h = nameHash(key)
+        i = bisect.bisect_left(hashes, h)
+        while i < len(hashes) and hashes[i] == h:
+            found.append(indexes[i])
+            i += 1
+        found.extend(added.get(key, ()))
+        return found
+
+    # returns list of indexes matching name exactly, then without edition suffixes
+    # normalized(idx) returns the current normalized name at index, drops hash collisions and replaced names
+    def lookup(self, name, normalized=None):
+        name = normalize(name)
+        stripped = stripEdition(name)
+        exact = (self.hashes, self.indexes, self.added)
+        base = (self.bases, self.base_indexes, self.added_base)
+        for table, key in ((exact, name), (exact, stripped), (base, name), (base, stripped)):
+            found = self._find(*table, key)
+            if normalized is not None:
+                found = [idx for idx in found if key in (normalized(idx), stripEdition(normalized(idx)))]
+            if found:
+                # drops duplicates keeping order, dicts are not ordered before python 3.7
+                seen = set()
+                return [idx for idx in found if not (idx in seen or seen.add(idx))]
+        return []
+
+
+# magic, version, app count, fetched and modified of the app list the indexes were built from
+header = struct.Struct('<4sIIdd')
+magic = b'SSFS'
+version = 2
+
+
+# writes name and trigram indexes of app list to path
+def saveIndexes(path, applist, names, trigrams):
+    writeArrays(path, header.pack(magic, version, *applist.stamp()),
+                (names.hashes, names.indexes, names.bases, names.base_indexes,
+                 trigrams.keys, trigrams.starts, trigrams.postings, trigrams.sizes))
+
+
+# returns (name index, trigram index) read from path, raises ValueError if not built from app list
+def loadIndexes(path, applist, mapped=False):
+    fields, arrays = readArrays(path, header, 8, magic, version, mapped)
+    if fields[2:] != applist.stamp():
+        raise ValueError('Index file does not match app list.')
+    return NameIndex(*arrays[:4]), TrigramIndex(*arrays[4:])
+
+
+class _Keys:
+    '''
+        sorted view of (index, word offset) entries as the name suffixes they stand for, searched with bisect
+    '''
+
+    def __init__(self, names, indexes, offsets):
+        self.names = names
+        self.indexes = indexes
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def __getitem__(self, i):
+        return self.names[self.indexes[i]][self.offsets[i]:]
+
+
+class PrefixIndex:
+    '''
+        normalized names sorted for prefix lookups, whole names first then names from every later word
+        entries are (index, word offset) pairs, names are not copied per word
+    '''
+
+    def __init__(self, names, starts, words):
+        self.names = names
+        self.starts = starts
+        self.words = words
+
+    # builds index from list of normalized names by index
+    @classmethod
+    def build(cls, names):
+        starts = sorted(range(len(names)), key=names.__getitem__)
+        words = []
+        for idx, name in enumerate(names):
+            offset = name.find(' ')
+            while offset != -1:
+                words.append((idx, offset + 1))
+                offset = name.find(' ', offset + 1)
+        words.sort(key=lambda entry: names[entry[0]][entry[1]:])
+        return cls(names,
+                   _Keys(names, array.array('I', starts), array.array('I', [0]) * len(starts)),
+                   _Keys(names, array.array('I', (idx for idx, offset in words)),
+                         array.array('I', (offset for idx, offset in words))))
+
+    # yields indexes of entries starting with prefix in sorted order
+    def _scan(self, keys, prefix):
+        for i in range(bisect.bisect_left(keys, prefix), len(keys)):
+            if not keys[i].startswith(prefix):
+                break
+            yield keys.indexes[i]
+
+    # returns up to limit indexes of names starting with prefix, then of names with a word starting with it
+    # rank(idx) orders matches highest first, only the first scan matches are ranked, None ranks below any score
+    def lookup(self, prefix, limit=10, rank=None, scan=1000):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        wanted = limit if rank is None else scan
+        # list keeps the scan order, dicts are not ordered before python 3.7
+        found = []
+        seen = set()
+        for keys in (self.starts, self.words):
+            for idx in self._scan(keys, prefix):
+                if len(found) >= wanted:
+                    break
+                if idx not in seen:
+                    seen.add(idx)
+                    found.append(idx)
+
+        if rank is None:
+            return found
+        scores = {idx: rank(idx) for idx in found}
+        # stable, names starting with prefix win ties, apps without a score keep the scan order
+        return heapq.nlargest(limit, found, key=lambda idx: (scores[idx] is not None, scores[idx] or 0))
@@ -1,10 +1,32 @@
 import requests
+from .cache import LRUCache
+from .session import Session
 
 
 class Package:
     api_url = "https://store.steampowered.com/api/packagedetails?packageids="
     data = {}
     appid = 0
+    chunk_size = 100
+
+    def __init__(self, cache=None, session=None, currency=None, language=None):
+        self.cache = cache if cache is not None else LRUCache()
+        self.session = session if session is not None else Session()
+        self.currency = currency
+        self.language = language
+
+    # returns cache key for package id
+    def _key(self, appid, currency=None):
+        return ('package', appid, currency or self.currency, self.language)
+
+    # returns packagedetails url for package id, or comma separated package ids
+    def _url(self, appid, currency=None):
+        url = self.api_url + appid
+        if currency or self.currency:
+            url += "&cc=" + (currency or self.currency)
+        if self.language:
+            url += "&l=" + self.language
+        return url
 
     '''
         DATA
@@ -28,21 +50,68 @@ class Package:
         self.appid = appid
 
         # request the data
-        res = requests.get(self.api_url + appid)
+        res = self.session.get(self._url(appid))
 
         if res.status_code == requests.codes.ok:
-            json = res.json()
-            # if game exists
-            if json[appid]['success']:
-                self.data = json[appid]['data']
-            return self.data
+            return self._parse(appid, res.json())
         else:
             return None
 
-    # populate internal data dictionary
+    # stores data from packagedetails json
+    def _parse(self, appid, json):
+        # if game exists
+        if json[appid]['success']:
+            self.data = json[appid]['data']
+            self.cache.set(self._key(appid), self.data)
+        else:
+            self.data = {}
+        return self.data
+
+    # returns {package id: data} requesting up to chunk_size packages at once
+    # data is {} if package does not exist and None if the request failed
+    def getPackages(self, appids, currency=None):
+        results, missing = self._cached(appids, currency)
+        for chunk in self._chunks(missing):
+            res = self.session.get(self._url(",".join(str(appid) for appid in chunk), currency))
+            self._parseMany(chunk, res.json() if res.status_code == requests.codes.ok else None, currency, results)
+        return results
+
+    # returns ({package id: cached data}, package ids missing from cache)
+    def _cached(self, appids, currency=None):
+        results = {}
+        missing = []
+        for appid in appids:
+            data = self.cache.get(self._key(str(appid), currency))
+            if data is not None:
+                results[appid] = data
+            else:
+                missing.append(appid)
+        return results, missing
+
+    # returns chunks of package ids requested at once
+    def _chunks(self, appids):
+        return [appids[i:i + self.chunk_size] for i in range(0, len(appids), self.chunk_size)]
+
+    # stores data of every package of chunk from packagedetails json into results and cache
+    # json is None if the request failed
+    def _parseMany(self, chunk, json, currency, results):
+        json = json if isinstance(json, dict) else None
+        for appid in chunk:
+            entry = json.get(str(appid)) if json else None
+            if entry and entry['success']:
+                results[appid] = entry['data']
+                self.cache.set(self._key(str(appid), currency), entry['data'])
+            else:
+                results[appid] = {} if json else None
+
+    # populate internal data dictionary from cache, returns data or None if the request failed
     def _populate(self, appid):
-        if not self.data or appid != self.appid or self.appid == 0:
-            self.getRaw(appid)
+        data = self.cache.get(self._key(appid))
+        if data is None:
+            data = self.getRaw(appid)
+        self.appid = appid
+        self.data = data if data is not None else {}
+        return data
 
     # returns name
     def getName(self, appid):
@@ -91,8 +160,15 @@ class Package:
 
     # returns price in specific currency
     def getPriceInCurrency(self, appid, currency):
-        req = requests.get(self.api_url + appid + "&cc=" + currency).json()
+        req = self.session.get(self._priceUrl(appid, currency)).json()
+        return self._getPriceInCurrency(appid, req)
+
+    # returns packagedetails url for package id in currency
+    def _priceUrl(self, appid, currency):
+        return self.api_url + appid + "&cc=" + currency
 
+    # extracts price from packagedetails json
+    def _getPriceInCurrency(self, appid, req):
         if req[appid]["data"]:
             return req[appid]["data"]["price"]
         else:
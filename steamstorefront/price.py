@@ -0,0 +1,94 @@
+import threading
+from concurrent.futures import Future
+from .session import Session
+
+
+class PriceBatcher:
+    '''
+        collects price lookups and sends them as one multi appid appdetails request per currency
+        lookups arriving within window seconds share a request, window 0 sends only on flush
+    '''
+
+    api_url = "https://store.steampowered.com/api/appdetails?filters=price_overview&cc={}&appids={}"
+    window = 0.05
+    chunk_size = 100
+
+    def __init__(self, session=None, window=None, chunk_size=None):
+        self.session = session if session is not None else Session()
+        if window is not None:
+            self.window = window
+        if chunk_size is not None:
+            self.chunk_size = chunk_size
+        self._pending = {}
+        self._timer = None
+        self._lock = threading.Lock()
+
+    # queues appid, returns future resolving to price overview or None
+    def add(self, appid, currency):
+        future = Future()
+        with self._lock:
+            self._pending.setdefault(currency, {}).setdefault(str(appid), []).append(future)
+            if self.window and self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return future
+
+    # sends every queued lookup
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        try:
+            for currency, futures in pending.items():
+                appids = list(futures)
+                for i in range(0, len(appids), self.chunk_size):
+                    self._send(currency, appids[i:i + self.chunk_size], futures)
+        finally:
+            # callers wait without a timeout, none of them may be left unresolved
+            for futures in pending.values():
+                for waiting in futures.values():
+                    for future in waiting:
+                        if not future.done():
+                            future.set_exception(RuntimeError("Price lookup was not resolved."))
+
+    # requests prices for a chunk of appids and resolves their futures, errors are set on every future of the chunk
+    def _send(self, currency, appids, futures):
+        try:
+            res = self.session.get(self.api_url.format(currency, ",".join(appids)))
+            json = res.json() if res.status_code == 200 else {}
+            for appid in appids:
+                price = self._price(json, appid)
+                for future in futures[appid]:
+                    future.set_result(price)
+        except Exception as e:
+            for appid in appids:
+                for future in futures[appid]:
+                    if not future.done():
+                        future.set_exception(e)
+
+    # returns price overview of appid from a multi appid response, None for free or missing apps
+    # bad appid lists are answered with null instead of an object
+    @staticmethod
+    def _price(json, appid):
+        entry = json.get(appid) if isinstance(json, dict) else None
+        # free apps return an empty list as data
+        if isinstance(entry, dict) and entry.get('success') and isinstance(entry.get('data'), dict):
+            return entry['data'].get('price_overview')
+        return None
+
+    # returns price overview of appid, waiting for the batch it joins
+    def get(self, appid, currency, timeout=None):
+        future = self.add(appid, currency)
+        if not self.window:
+            self.flush()
+        return future.result(timeout)
+
+    # returns {appid: price overview} using as few requests as possible
+    def getMany(self, appids, currency):
+        futures = {appid: self.add(appid, currency) for appid in appids}
+        self.flush()
+        return {appid: future.result() for appid, future in futures.items()}
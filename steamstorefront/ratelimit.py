@@ -0,0 +1,121 @@
+import email.utils, random, threading, time
+
+
+class TokenBucket:
+    '''
+        allows calls requests per period seconds, bursts up to calls
+    '''
+
+    def __init__(self, calls, period):
+        self.rate = calls / period
+        self.capacity = calls
+        self.tokens = calls
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    # refills tokens up to now
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    # takes a token, returns seconds to wait before using it
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            # updated is in the future while paused
+            return max(0, self.updated - now) + max(0, -self.tokens) / self.rate
+
+    # blocks until a token is available
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    # drains the bucket and stops refilling for seconds
+    def pause(self, seconds):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens = min(self.tokens, 0)
+            self.updated = max(self.updated, now + seconds)
+
+
+class RateLimiter:
+    '''
+        one token bucket per storefront endpoint
+        limits are (calls, period) per endpoint, None disables limiting for that endpoint
+    '''
+
+    limits = {
+        'appdetails': (200, 300),
+        'packagedetails': (200, 300),
+        'appreviews': (100, 60),
+        'bundle': (60, 60),
+        'GetAppList': (10, 60),
+    }
+
+    # url fragments identifying each endpoint
+    endpoints = {
+        '/api/appdetails': 'appdetails',
+        '/api/packagedetails': 'packagedetails',
+        '/appreviews/': 'appreviews',
+        '/bundle/': 'bundle',
+        '/GetAppList/': 'GetAppList',
+    }
+
+    def __init__(self, limits=None, max_retries=3, backoff=2, max_backoff=300):
+        if limits:
+            self.limits = dict(self.limits, **limits)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.buckets = {endpoint: TokenBucket(*limit) for endpoint, limit in self.limits.items() if limit}
+
+    # returns endpoint name for url or None
+    def endpoint(self, url):
+        for fragment, endpoint in self.endpoints.items():
+            if fragment in url:
+                return endpoint
+        return None
+
+    # returns seconds to wait before requesting url
+    def reserve(self, url):
+        bucket = self.buckets.get(self.endpoint(url))
+        return bucket.reserve() if bucket else 0
+
+    # blocks until url can be requested
+    def acquire(self, url):
+        wait = self.reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+
+    # returns true if response status should be retried
+    def shouldRetry(self, status):
+        return status == 429 or status >= 500
+
+    # pauses the endpoint for every caller before a retry
+    # returns seconds the caller has to sleep itself, endpoints without a bucket are not paused
+    def delay(self, url, attempt, retry_after=None):
+        delay = self._retryAfter(retry_after)
+        if delay is None:
+            delay = min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1)
+        bucket = self.buckets.get(self.endpoint(url))
+        if bucket:
+            bucket.pause(delay)
+            return 0
+        return delay
+
+    # parses retry-after header, seconds or http date
+    def _retryAfter(self, value):
+        if not value:
+            return None
+        if value.strip().isdigit():
+            return min(self.max_backoff, int(value))
+        try:
+            date = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return min(self.max_backoff, max(0, date.timestamp() - time.time()))
@@ -0,0 +1,121 @@
+import requests, time
+from requests.adapters import HTTPAdapter
+from .cache import LRUCache
+from .errors import RateLimited, Errors
+from .ratelimit import RateLimiter
+from .singleflight import SingleFlight
+
+
+class Session(requests.Session):
+    '''
+        pooled http session shared by app, package, bundle and fuzzy search
+        keeps connections to the store alive and applies a default timeout
+        every request waits for the rate limiter of its endpoint and is retried on 429 and 5xx
+        concurrent GET requests for the same url share one response
+        GET requests send the ETag and Last-Modified of the previous response, 304 is answered with its body
+    '''
+
+    timeout = 10
+    # responses kept for conditional requests when no validators cache is passed
+    validator_size = 128
+
+    def __init__(self, pool_size=10, timeout=None, limiter=None, coalesce=True, conditional=True, validators=None):
+        super().__init__()
+        if timeout is not None:
+            self.timeout = timeout
+        self.limiter = limiter if limiter is not None else RateLimiter()
+        self.inflight = SingleFlight() if coalesce else None
+        # (etag, last modified, body) by url, eg:- SQLiteCache(path) to keep them between runs
+        self.validators = None
+        if conditional:
+            self.validators = validators if validators is not None else LRUCache(self.validator_size)
+
+        # one pool per host, store.steampowered.com and api.steampowered.com
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+        self.headers['Accept-Encoding'] = 'gzip, deflate'
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+
+        if self.inflight is None or method.upper() != 'GET' or kwargs.get('stream'):
+            return self._request(method, url, **kwargs)
+
+        key = (url, self._freeze(kwargs.get('params')), self._freeze(kwargs.get('cookies')))
+        return self.inflight.do(key, lambda: self._request(method, url, **kwargs))
+
+    # returns hashable form of params or cookies
+    def _freeze(self, value):
+        if not value:
+            return None
+        if isinstance(value, dict):
+            return tuple(sorted((str(k), str(v)) for k, v in value.items()))
+        return str(value)
+
+    # returns cache key of validators for request, None if it is not conditional
+    def _validatorKey(self, method, url, kwargs):
+        # streamed bodies may be read only in part, they are never stored
+        if self.validators is None or method.upper() != 'GET' or kwargs.get('stream'):
+            return None
+        return ('http', requests.Request('GET', url, params=kwargs.get('params')).prepare().url, None, None)
+
+    # returns stored validators as request headers
+    def _conditionalHeaders(self, stored, headers):
+        headers = dict(headers or {})
+        if stored[0]:
+            headers['If-None-Match'] = stored[0]
+        if stored[1]:
+            headers['If-Modified-Since'] = stored[1]
+        return headers
+
+    # returns 200 response with the stored body for a 304 response
+    def _replay(self, res, content):
+        replay = requests.Response()
+        replay.status_code = 200
+        replay.reason = 'OK'
+        replay._content = content
+        replay.headers = res.headers
+        replay.url = res.url
+        replay.history = res.history
+        replay.request = res.request
+        replay.elapsed = res.elapsed
+        return replay
+
+    # sends request through the rate limiter
+    def _request(self, method, url, **kwargs):
+        key = self._validatorKey(method, url, kwargs)
+        stored = self.validators.get(key) if key is not None else None
+        if stored is not None:
+            kwargs['headers'] = self._conditionalHeaders(stored, kwargs.get('headers'))
+
+        attempt = 0
+        while True:
+            self.limiter.acquire(url)
+            res = super().request(method, url, **kwargs)
+            if not self.limiter.shouldRetry(res.status_code):
+                if key is not None:
+                    res = self._revalidate(key, stored, res)
+                return res
+
+            if attempt >= self.limiter.max_retries:
+                # throttled responses would otherwise look like missing apps
+                if res.status_code == 429:
+                    raise RateLimited("Rate limited by store after {} retries.".format(attempt), url, Errors.RateLimited)
+                return res
+
+            delay = self.limiter.delay(url, attempt, res.headers.get('Retry-After'))
+            if delay > 0:
+                time.sleep(delay)
+            attempt += 1
+
+    # stores validators of response, answers 304 with the stored body and keeps it for longer
+    def _revalidate(self, key, stored, res):
+        if res.status_code == 304 and stored is not None:
+            self.validators.set(key, stored)
+            return self._replay(res, stored[2])
+
+        etag, modified = res.headers.get('ETag'), res.headers.get('Last-Modified')
+        if res.status_code == 200 and (etag or modified):
+            self.validators.set(key, (etag, modified, res.content))
+        return res
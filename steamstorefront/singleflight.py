@@ -0,0 +1,43 @@
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    '''
+        runs one call per key at a time, concurrent callers with the same key wait for it and share the result
+    '''
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    # calls fn, or waits for the call already in flight for key
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
@@ -1,10 +1,14 @@
 """Main module."""
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from .errors import InvalidArgument
 from .errors import Errors
 from .misc import FuzzySearch
 from .app import App
 from .package import Package
 from .bundle import Bundle
+from .cache import LRUCache
+from .session import Session
+from .price import PriceBatcher
 
 
 class SteamStoreFront:
@@ -17,6 +21,22 @@ class SteamStoreFront:
     :type category: string
     :type name: string
     :type url: string
+    :param cache_size: number of entries kept per category in the in-memory cache, defaults to 256
+    :type cache_size: integer
+    :param cache: cache backend shared by all categories, eg:- SQLiteCache(path), defaults to an in-memory cache per category
+    :type cache: LRUCache or SQLiteCache
+    :param session: http session shared by all requests, defaults to a pooled Session
+    :type session: Session or requests.Session
+    :param price_window: seconds to collect concurrent price lookups into one request, defaults to 0.02
+    :type price_window: float
+    :param api_key: steam web api key, lets the app list used for name lookups refresh only changed apps
+    :type api_key: string
+    :param parser: beautifulsoup parser for bundle pages, defaults to lxml if installed else html5lib
+    :type parser: string
+    :param warm: load the app list used for name lookups in a background thread right away, defaults to False
+    :type warm: boolean
+    :param search_timeout: seconds a name lookup waits for the background load, only exact names are found after it, defaults to waiting until loaded
+    :type search_timeout: float
 
     .. note::
 
@@ -29,6 +49,7 @@ class SteamStoreFront:
         category defaults to "app"
 
     :raise InvalidArgument: See error message for explanation. Additionally error can be looked up for argument and type for error code.
+    :raise AppsLoading: if a name is passed while the app list is still downloading after search_timeout.
 
     :rtype: None if key not found.
     """
@@ -39,6 +60,14 @@ class SteamStoreFront:
     app = None
     bundle = None
     package = None
+    cache_size = 256
+    cache = None
+    session = None
+    price_window = 0.02
+    search = None
+    search_timeout = None
+    parser = None
+    api_key = None
     Errors = Errors
 
     # populate
@@ -78,8 +107,8 @@ class SteamStoreFront:
             # name was passed
             if "name" in kwargs:
                 # query for appid
-                obj = FuzzySearch()
-                self.appid = obj.getAppID(kwargs["name"])
+                appid = self._getSearch().getAppID(kwargs["name"], self.search_timeout)
+                self.appid = str(appid) if appid else None
                 self.category = 'app'
                 if not self.appid:
                     raise InvalidArgument("App not found for this game {}".format(kwargs['name']), kwargs, Errors.InvalidName)
@@ -109,50 +138,312 @@ class SteamStoreFront:
                 raise InvalidArgument("No identifier was passed, atleast one of appid, url, name is required.", kwargs, Errors.NoArgumentPassed)
 
         else:
-            self.app = App()
-            self.bundle = Bundle()
-            self.package = Package()
+            self.app = App(cache=self.cache if self.cache is not None else LRUCache(self.cache_size),
+                           session=self.session, prices=PriceBatcher(self.session, window=self.price_window))
+            # memoized pages would evict payloads from a bounded in-memory cache, they get their own
+            pages = self.cache if self.cache is not None and not isinstance(self.cache, LRUCache) else None
+            self.bundle = Bundle(cache=self.cache if self.cache is not None else LRUCache(self.cache_size),
+                                 session=self.session, parser=self.parser, pages=pages)
+            self.package = Package(cache=self.cache if self.cache is not None else LRUCache(self.cache_size),
+                                   session=self.session)
 
     def __init__(self, **kwargs):
+        # cache settings
+        if "cache_size" in kwargs:
+            self.cache_size = kwargs.pop("cache_size")
+        if "cache" in kwargs:
+            self.cache = kwargs.pop("cache")
+
+        if "price_window" in kwargs:
+            self.price_window = kwargs.pop("price_window")
+        if "api_key" in kwargs:
+            self.api_key = kwargs.pop("api_key")
+        if "search_timeout" in kwargs:
+            self.search_timeout = kwargs.pop("search_timeout")
+        if "parser" in kwargs:
+            self.parser = kwargs.pop("parser")
+
+        # one pooled session for every request made by this instance
+        # stored responses for conditional requests would evict payloads from a bounded in-memory cache,
+        # they are kept in a persistent cache only, else in the session's own
+        validators = self.cache if self.cache is not None and not isinstance(self.cache, LRUCache) else None
+        self.session = kwargs.pop("session", None) or Session(validators=validators)
+
+        # first name lookup does not have to download and index the app list
+        if kwargs.pop("warm", False):
+            self._getSearch().warm()
+
         # populate
         kwargs["init"] = True
         self._populate(**kwargs)
-        app = App()
-        bundle = Bundle()
-        package = Package()
+
+    def getCacheStats(self):
+        """
+            getCacheStats()
+
+            .. code-block:: python
+
+                getCacheStats()
+
+            :return: returns hits, misses, size and capacity of the cache for each category
+            :rtype: dictionary
+        """
+
+        return {
+            'app': self.app.cache.stats(),
+            'package': self.package.cache.stats(),
+            'bundle': self.bundle.cache.stats(),
+        }
+
+    # returns fuzzy search shared by this instance and its clones
+    def _getSearch(self):
+        if self.search is None:
+            self.search = FuzzySearch(session=self.session, prefer=self._isGame, key=self.api_key)
+        return self.search
+
+    def searchApps(self, name, k=10):
+        """
+            searchApps(name, k=k)
+
+            .. code-block:: python
+
+                searchApps("tomb raider", k=10)
+
+            :return: returns up to k (appid, name, score) tuples, best match first
+            :rtype: list
+        """
+
+        return self._getSearch().search(name, k)
+
+    def completeApps(self, prefix, limit=10, rank=None):
+        """
+            completeApps(prefix, limit=limit, rank=rank)
+
+            .. code-block:: python
+
+                completeApps("tomb ra", limit=5, rank=players.get)
+
+            - matches names starting with prefix first, then names with a later word starting with it
+            - rank(appid) returns a popularity score, more popular apps come first, apps scored None come last
+
+            :return: returns up to limit (appid, name) tuples
+            :rtype: list
+        """
+
+        return self._getSearch().complete(prefix, limit, rank)
+
+    def resolveNames(self, names, workers=1):
+        """
+            resolveNames(names, workers=workers)
+
+            .. code-block:: python
+
+                resolveNames(["Tomb Raider", "Portal 2"], workers=-1)
+
+            - names without an exact match are scored against every app at once with rapidfuzz if installed
+            - workers is the number of threads used for scoring, -1 uses every core
+            - apps sharing a name resolve to the lowest appid without requesting their details
+
+            :return: returns (appid, name, score) or None for every name, in the same order
+            :rtype: list
+        """
+
+        return self._getSearch().resolveMany(names, workers)
+
+    def refreshApps(self):
+        """
+            refreshApps()
+
+            .. code-block:: python
+
+                SteamStoreFront(api_key=api_key).refreshApps()
+
+            - merges apps added or renamed since the last refresh into the app list used for name lookups
+            - requires api_key
+
+            :return: returns number of added or renamed apps
+            :rtype: int
+        """
+
+        return self._getSearch().refresh()
+
+    def waitForApps(self, timeout=None):
+        """
+            waitForApps(timeout=timeout)
+
+            .. code-block:: python
+
+                SteamStoreFront(warm=True).waitForApps(timeout=30)
+
+            - waits for the app list started loading by warm=True
+
+            :return: returns False if the app list is still loading after timeout seconds
+            :rtype: boolean
+        """
+
+        return self._getSearch().wait(timeout)
+
+    # returns true if appid is a game, used to pick between apps with the same name
+    def _isGame(self, appid):
+        # names passed to the constructor are resolved before the modules exist
+        app = App(cache=self.app.cache if self.app is not None else None, session=self.session)
+        app._populate(str(appid))
+        return app.data.get('type') == 'game'
+
+    # returns a new instance sharing caches and session, used by worker threads
+    def _clone(self):
+        client = SteamStoreFront(cache_size=self.cache_size, cache=self.cache, session=self.session,
+                                 api_key=self.api_key, search_timeout=self.search_timeout, parser=self.parser)
+        client.app.cache = self.app.cache
+        client.package.cache = self.package.cache
+        client.bundle.cache = self.bundle.cache
+        client.bundle.pages = self.bundle.pages
+        client.app.prices = self.app.prices
+        client.search = self.search
+        return client
+
+    def getPrices(self, ids, currency):
+        """
+            getPrices(ids, currency)
+
+            .. code-block:: python
+
+                getPrices([203160, 730], "us")
+
+            - supported categories = [app]
+            - currency should be in 2 letters, eg:- USD : us, INR : in, etc
+            - up to 100 apps are requested at once
+
+            :return: returns {id: price}, price is None for free or missing apps
+            :rtype: dictionary
+        """
+
+        return self.app.prices.getMany(ids, currency)
+
+    def getMany(self, ids, fields=None, category="app", workers=8, **kwargs):
+        """
+            getMany(ids, fields=fields, category=category, workers=workers)
+
+            .. code-block:: python
+
+                getMany([203160, 730], fields=["getName", "getPrice"], category="app", currency="us")
+
+            - supported categories = [app, sub, bundle]
+            - fields are names of get functions, defaults to getRaw
+            - extra arguments like currency or format are passed to every get function
+            - an error for one id is returned in its result instead of being raised
+
+            :return: returns {id: {'success': bool, 'data': data, 'error': exception}}, data is a dictionary of field: value when fields are passed
+            :rtype: dictionary
+        """
+
+        results = {}
+        fields = list(fields) if fields else None
+
+        # prices in a currency are requested for many apps at once
+        prices = None
+        if fields and "getPrice" in fields and "currency" in kwargs and category == "app":
+            try:
+                prices = self.getPrices(ids, kwargs["currency"])
+            except Exception:
+                prices = None
+
+        # packages are requested many at once, workers read them from cache
+        packages = None
+        if category in ("sub", "package") and "currency" not in kwargs:
+            try:
+                packages = self.package.getPackages([str(appid) for appid in ids])
+            except Exception:
+                packages = None
+
+        def fetch(appid):
+            client = self._clone()
+            if not fields:
+                if packages is not None and packages.get(str(appid)) is not None:
+                    return packages[str(appid)]
+                # read through the cache like the get functions, only missing ids are requested
+                return client.getRaw(appid=appid, category=category, **kwargs)
+            # bundle getters parse only their own part of the page, fetch it once for every field
+            if category == "bundle" and len(fields) > 1:
+                client.bundle._populate(str(appid))
+            data = {}
+            for field in fields:
+                if field == "getPrice" and prices is not None:
+                    data[field] = prices[appid]
+                else:
+                    data[field] = getattr(client, field)(appid=appid, category=category, **kwargs)
+            return data
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(fetch, appid): appid for appid in ids}
+            for future in as_completed(futures):
+                appid = futures[future]
+                try:
+                    data = future.result()
+                    results[appid] = {'success': data is not None, 'data': data, 'error': None}
+                except Exception as e:
+                    results[appid] = {'success': False, 'data': None, 'error': e}
+
+        return results
+
+    def crawlBundles(self, ids, processes=None, threads=8):
+        """
+            crawlBundles(ids, processes=processes, threads=threads)
+
+            .. code-block:: python
+
+                for bundleid, result in crawlBundles([12231, 232]):
+                    result['data']['name']
+
+            - pages are downloaded by threads and parsed by a pool of processes, processes defaults to the number of cores
+            - results come in completion order as pages are parsed, errors are returned per id
+
+            :return: yields (id, {'success': bool, 'data': data, 'error': exception})
+            :rtype: generator
+        """
+
+        return self.bundle.crawl(ids, processes, threads)
 
     def getRaw(self, **kwargs):
         """
-            getRaw(appid=appid, category=category, name=name, url=url)
+            getRaw(appid=appid, category=category, name=name, url=url, refresh=refresh)
 
             .. code-block:: python
 
                 getRaw(appid=appid, category=category, name=name, url=url)
 
             - supported categories = [app, sub, bundle]            
+            - cached data is returned without a request, refresh=True fetches it again and updates the cache
 
             :return: returns raw json data
             :rtype: dictionary
         """
 
+        refresh = kwargs.pop("refresh", False)
+
         # store data
         self._populate(**kwargs)
 
         # get data for app
         if self.category == "app":
-            return self.app.getRaw(self.appid)
+            module = self.app
 
         # get data for packages
         elif self.category == "sub" or self.category == "package":
-            return self.package.getRaw(self.appid)
+            module = self.package
 
         # get data for bundles
         elif self.category == "bundle":
-            return self.bundle.getRaw(self.appid)
+            module = self.bundle
 
         else:
             raise InvalidArgument("No app with {} appid.".format(self.appid), kwargs, Errors.InvalidAppId)
 
+        # explicit refetch bypasses the cache, the fresh payload replaces the cached one
+        if refresh:
+            return module.getRaw(self.appid)
+        return module._populate(self.appid)
+
     # returns store url
     def getLink(self, **kwargs):
         """
@@ -804,16 +1095,17 @@ class SteamStoreFront:
     # returns packages
     def getPackages(self, **kwargs):
         """
-            getPackages(appid=appid, category=category, name=name, url=url)
+            getPackages(appid=appid, category=category, name=name, url=url, details=details, currency=currency)
 
             .. code-block:: python
 
-                getPackages(appid=appid, category=category, name=name, url=url)
+                getPackages(appid=appid, category=category, name=name, url=url, details=details, currency=currency)
             
             - supported categories = [app]
+            - with details=True every package of the app is fetched in one request
             
-            :return: returns packages
-            :rtype: list
+            :return: returns packages, or {package id: package data} with details
+            :rtype: list or dictionary
         """
 
         # store data
@@ -821,7 +1113,10 @@ class SteamStoreFront:
 
         # get data for app
         if self.category == "app":
-            return self.app.getPackages(self.appid)
+            packages = self.app.getPackages(self.appid)
+            if packages is not None and kwargs.get("details"):
+                return self.package.getPackages(packages, kwargs.get("currency"))
+            return packages
 
         else:
             return None
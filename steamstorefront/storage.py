@@ -0,0 +1,66 @@
+import array, mmap, os, struct
+
+# typecode and byte length of every array
+section = struct.Struct('<c7xQ')
+
+
+# returns bytes needed to pad size to a multiple of 8
+def _padding(size):
+    return b'\0' * (-size % 8)
+
+
+# writes header and arrays to path, replaced atomically so other processes never read a partial file
+# arrays are aligned to 8 bytes so they can be mapped and cast in place
+def writeArrays(path, header, arrays):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp = '{}.{}.tmp'.format(path, os.getpid())
+    with open(temp, 'wb') as f:
+        f.write(header + _padding(len(header)))
+        data = []
+        for values in arrays:
+            if isinstance(values, array.array):
+                typecode, values = values.typecode, values.tobytes()
+            elif isinstance(values, memoryview):
+                typecode, values = values.format, values.tobytes()
+            else:
+                typecode, values = 'B', bytes(values)
+            f.write(section.pack(typecode.encode(), len(values)))
+            data.append(values)
+        for values in data:
+            f.write(values + _padding(len(values)))
+    os.replace(temp, path)
+
+
+# returns (header fields, arrays) read from path, header has to start with magic and version
+# mapped files are shared read only with every process mapping them, arrays are then memoryviews
+def readArrays(path, header, count, magic, version, mapped=False):
+    with open(path, 'rb') as f:
+        if mapped:
+            buffer = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        else:
+            buffer = memoryview(f.read())
+
+    position = header.size + len(_padding(header.size))
+    if len(buffer) < position + count * section.size:
+        raise ValueError('Invalid index file.')
+    fields = header.unpack_from(buffer)
+    if fields[:2] != (magic, version):
+        raise ValueError('Invalid index file.')
+
+    table = [section.unpack_from(buffer, position + i * section.size) for i in range(count)]
+    position += count * section.size
+
+    arrays = []
+    for typecode, size in table:
+        if len(buffer) < position + size:
+            raise ValueError('Truncated index file.')
+        view = buffer[position:position + size]
+        typecode = typecode.decode()
+        if typecode == 'B':
+            arrays.append(view if mapped else view.tobytes())
+        elif mapped:
+            arrays.append(view.cast(typecode))
+        else:
+            arrays.append(array.array(typecode, view.tobytes()))
+        position += size + len(_padding(size))
+    return fields, arrays
@@ -0,0 +1,91 @@
+"""Fake store transport shared by the offline tests, imported with from .conftest import ..."""
+
+import requests
+
+from requests.adapters import BaseAdapter
+
+
+class Response:
+    '''
+        canned response, json data or a body served in chunks
+        read is the number of body bytes handed out, streamed reads may stop early
+    '''
+
+    def __init__(self, data=None, status_code=200, content=b'', history=()):
+        self.data = data
+        self.status_code = status_code
+        self.content = content
+        self.history = list(history)
+        self.read = 0
+
+    def json(self):
+        if isinstance(self.data, Exception):
+            raise self.data
+        return self.data
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.content), chunk_size):
+            self.read = i + chunk_size
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+
+class Transport:
+    '''
+        stand-in for Session, every get is answered by handler(url, **kwargs)
+        handlers return a Response or json data for a 200 response, exceptions are raised to the caller
+        urls, keyword arguments and responses of every request are recorded
+    '''
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.urls = []
+        self.calls = []
+        self.responses = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        # callers reuse params dicts between pages
+        self.calls.append({name: dict(value) if isinstance(value, dict) else value for name, value in kwargs.items()})
+        res = self.handler(url, **kwargs)
+        if not isinstance(res, Response):
+            res = Response(res)
+        self.responses.append(res)
+        return res
+
+    @property
+    def requests(self):
+        return len(self.urls)
+
+
+# returns ids of a comma separated query parameter of url
+def ids(url, name):
+    return url.split(name + "=")[1].split("&")[0].split(",")
+
+
+class Adapter(BaseAdapter):
+    '''
+        stand-in for the store below a real Session, mounted with session.mount('https://', adapter)
+        handler(request) returns (status, headers, body), every request is recorded
+    '''
+
+    def __init__(self, handler=None):
+        super().__init__()
+        self.handler = handler or (lambda request: (200, {}, b'{}'))
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        status, headers, content = self.handler(request)
+        res = requests.Response()
+        res.request = request
+        res.url = request.url
+        res.status_code = status
+        res.headers.update(headers)
+        res._content = content
+        return res
+
+    def close(self):
+        pass
@@ -8,6 +8,8 @@ from click.testing import CliRunner
 
 from steamstorefront import SteamStoreFront
 from steamstorefront import cli
+from steamstorefront.app import App
+from steamstorefront.cache import LRUCache, SQLiteCache
 
 # Tomb Raider Reboot
 appid = 203160
@@ -250,4 +252,33 @@ def test_command_line_interface():
     assert 'steamstorefront.cli.main' in result.output
     help_result = runner.invoke(cli.main, ['--help'])
     assert help_result.exit_code == 0
-    assert '--help  Show this message and exit.' in help_result.output
\ No newline at end of file
+    assert '--help  Show this message and exit.' in help_result.output
+
+payload = {
+    'name': 'Tomb Raider',
+    'pc_requirements': {'minimum': '<strong>Minimum:</strong><br><ul class="bb_ul"><li><strong>OS:</strong> Windows XP</li></ul>'},
+    'supported_languages': 'English<strong>*</strong>, French<br><strong>*</strong>languages with full audio support',
+}
+
+# derived views are computed once and kept with the cached payload
+def testViews():
+    cache = LRUCache()
+    cache.set(('app', '10', None, None), payload)
+    module = App(cache=cache)
+    data = module.getPCRequirements('10', format='dict')
+    assert data['minimum']['OS'] == ' Windows XP'
+    data['minimum']['OS'] = 'changed'
+    assert module.getPCRequirements('10', format='dict')['minimum']['OS'] == ' Windows XP'
+    assert module.getSupportedLanguages('10', format='list') == ['English', 'French']
+    assert cache.get(('app', '10', None, None)).views['supported_languages:list'] == ['English', 'French']
+
+# views survive the persistent cache
+def testViewsPersist(tmp_path):
+    cache = SQLiteCache(str(tmp_path / 'cache.db'))
+    cache.set(('app', '10', None, None), payload)
+    fetched = cache._conn.execute('SELECT fetched FROM payload').fetchone()
+    App(cache=cache).getPCRequirements('10', format='dict')
+    assert 'pc_requirements:dict' in cache.get(('app', '10', None, None)).views
+    # storing views does not renew the entry
+    assert cache._conn.execute('SELECT fetched FROM payload').fetchone() == fetched
+    cache.close()
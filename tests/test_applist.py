@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+
+"""Tests for `steamstorefront` app list index."""
+
+import json, threading, time
+
+import pytest
+import requests
+
+from steamstorefront.applist import AppList
+from steamstorefront.errors import AppsLoading
+from steamstorefront.misc import FuzzySearch
+from steamstorefront.nameindex import loadIndexes
+
+from .conftest import Response, Transport
+
+apps = [
+    {'appid': 203160, 'name': 'Tomb Raider'},
+    {'appid': 730, 'name': 'Counter-Strike: Global Offensive'},
+    {'appid': 292030, 'name': 'The Witcher® 3: Wild Hunt'},
+]
+
+
+@pytest.fixture
+def applist():
+    data = AppList.fromApps(apps)
+    return data
+
+# returns names and appids by index
+def testFromApps(applist):
+    assert len(applist) == 3
+    assert applist.appids[2] == 292030
+    assert applist.name(2) == 'The Witcher® 3: Wild Hunt'
+    assert list(applist.items())[0] == (0, 'Tomb Raider')
+
+# index file round trips
+def testSaveLoad(applist, tmp_path):
+    path = str(tmp_path / 'applist.idx')
+    applist.save(path)
+    data = AppList.load(path)
+    assert list(data.appids) == [203160, 730, 292030]
+    assert data.name(1) == 'Counter-Strike: Global Offensive'
+    assert data.fetched == applist.fetched
+
+# mapped index files are read only until updated
+def testLoadMapped(applist, tmp_path):
+    path = str(tmp_path / 'applist.idx')
+    applist.save(path)
+    data = AppList.load(path, mapped=True)
+    assert isinstance(data.appids, memoryview)
+    assert data.name(2) == 'The Witcher® 3: Wild Hunt'
+    data.update('key', Transport(storeService))
+    assert data.name(3) == 'Cyberpunk 2077'
+
+# invalid files are rejected
+def testLoadInvalid(tmp_path):
+    path = tmp_path / 'applist.idx'
+    path.write_bytes(b'not an index')
+    with pytest.raises(ValueError):
+        AppList.load(str(path))
+
+# shared list is loaded from file once
+def testShared(applist, tmp_path):
+    path = str(tmp_path / 'applist.idx')
+    applist.save(path)
+    assert AppList.shared(path) is AppList.shared(path)
+    assert AppList.shared(path).name(0) == 'Tomb Raider'
+
+
+@pytest.fixture
+def search(applist):
+    data = FuzzySearch(applist=applist)
+    return data
+
+# returns ranked matches
+def testSearch(search):
+    data = search.search('tomb raider', k=2)
+    assert data[0] == (203160, 'Tomb Raider', 100)
+    assert len(data) <= 2
+
+# completes names and words of names
+def testComplete(search):
+    assert search.complete('wild h') == [(292030, 'The Witcher® 3: Wild Hunt')]
+    assert [appid for appid, name in search.complete('t', rank={292030: 5, 203160: 1}.get)] == [292030, 203160]
+    assert [appid for appid, name in search.complete('t', rank={292030: 5}.get)] == [292030, 203160]
+
+# resolves many names in order
+def testResolveMany(search):
+    data = search.resolveMany(['witcher 3', 'Tomb Raider', 'counter strike global'])
+    assert [match[0] for match in data] == [292030, 203160, 730]
+
+# duplicate names are resolved without requesting app details
+def testResolveManyDuplicates():
+    calls = []
+    search = FuzzySearch(applist=AppList.fromApps(apps + [{'appid': 100, 'name': 'Tomb Raider'}]),
+                         prefer=lambda appid: calls.append(appid) or appid == 203160)
+    assert search.resolveMany(['Tomb Raider'])[0][0] == 100
+    assert calls == []
+    assert search.getAppID('Tomb Raider') == 203160
+
+# parses the response in chunks split anywhere
+def testParse():
+    body = json.dumps({'applist': {'apps': {'app': apps + [{'appid': 10, 'name': 'Quote "Escape"'}]}}}).encode('utf-8')
+    chunks = [body[i:i + 7] for i in range(0, len(body), 7)]
+    data = AppList.fromPairs(AppList.parse(chunks))
+    assert list(data.appids) == [203160, 730, 292030, 10]
+    assert data.name(2) == 'The Witcher® 3: Wild Hunt'
+    assert data.name(3) == 'Quote "Escape"'
+
+    # v0001 is pretty printed, objects straddling chunks start with whitespace
+    many = [{'appid': appid, 'name': 'App {}'.format(appid)} for appid in range(1, 3000)]
+    body = json.dumps({'applist': {'apps': {'app': many}}}, indent='\t').encode('utf-8')
+    for size in (7, 64, 65536):
+        data = AppList.fromPairs(AppList.parse(body[i:i + size] for i in range(0, len(body), size)))
+        assert list(data.appids) == list(range(1, 3000))
+
+
+# local stand-in for IStoreService/GetAppList, two pages of changes
+def storeService(url, params=None, **kwargs):
+    if params['last_appid'] == 0:
+        return {'response': {'apps': [{'appid': 730, 'name': 'Counter-Strike 2', 'last_modified': 2000}],
+                             'have_more_results': True, 'last_appid': 730}}
+    return {'response': {'apps': [{'appid': 1091500, 'name': 'Cyberpunk 2077', 'last_modified': 3000}]}}
+
+# merges renamed and new apps
+def testUpdate(applist, tmp_path):
+    applist.modified = 1000
+    session = Transport(storeService)
+    updated = applist.update('key', session)
+    assert updated == [(1, 'Counter-Strike: Global Offensive', 'Counter-Strike 2'), (3, None, 'Cyberpunk 2077')]
+    assert session.calls[0]['params']['if_modified_since'] == 1000
+    assert applist.modified == 3000
+    assert applist.name(1) == 'Counter-Strike 2'
+    assert applist.name(2) == 'The Witcher® 3: Wild Hunt'
+
+    path = str(tmp_path / 'applist.idx')
+    applist.save(path)
+    data = AppList.load(path)
+    assert data.name(3) == 'Cyberpunk 2077'
+    assert data.modified == 3000
+
+# refreshed apps are found by name, lists passed in are not saved over the shared file
+def testRefresh(search, tmp_path, monkeypatch):
+    monkeypatch.setattr(AppList, 'path', str(tmp_path / 'applist.idx'))
+    search.session = Transport(storeService)
+    search.search('tomb raider')
+    assert search.refresh('key') == 2
+    assert search.getAppID('Counter-Strike 2') == 730
+    assert search.getAppID('cyberpunk') == 1091500
+    assert search.names.lookup('Counter-Strike: Global Offensive', search._normalized) == []
+    assert not (tmp_path / 'applist.idx').exists()
+
+# shared indexes are updated and saved without building them again
+def testRefreshShared(applist, tmp_path):
+    path = str(tmp_path / 'applist.idx')
+    applist.save(path)
+    search = FuzzySearch(path=path, max_age=3600, session=Transport(storeService))
+    assert search.getAppID('Tomb Raider') == 203160
+    search._build = None
+    assert search.refresh('key') == 2
+    names, trigrams = loadIndexes(path + '.search', AppList.load(path))
+    assert names.lookup('Cyberpunk 2077') == [3]
+    assert 3 in trigrams.candidates('cyberpunk')
+
+# stale shared lists updated with changed apps update the indexes instead of building them again
+def testSharedUpdate(applist, tmp_path):
+    path = str(tmp_path / 'applist.idx')
+    applist.fetched = applist.modified = time.time() - 7200
+    applist.save(path)
+    search = FuzzySearch(path=path, max_age=86400, session=Transport(storeService), key='key')
+    assert search.getAppID('Tomb Raider') == 203160
+    names = search.names
+    search._build = None
+    search.max_age = 3600
+    assert search.getAppID('Cyberpunk 2077') == 1091500
+    assert search.getAppID('Counter-Strike 2') == 730
+    assert names.lookup('Cyberpunk 2077') == []
+    names, trigrams = loadIndexes(path + '.search', AppList.load(path))
+    assert names.lookup('Cyberpunk 2077') == [3]
+
+# indexes are saved next to the shared list and loaded by other searches
+def testSharedIndexes(applist, tmp_path):
+    path = str(tmp_path / 'applist.idx')
+    applist.save(path)
+    search = FuzzySearch(path=path)
+    assert search.getAppID('The Witcher 3') == 292030
+    names, trigrams = loadIndexes(path + '.search', AppList.shared(path), mapped=True)
+    assert isinstance(names.hashes, memoryview)
+    other = FuzzySearch(path=path)
+    assert other.getAppID('Tomb Raider') == 203160
+    assert other.names is search.names
+
+# exact names are found while indexes are still loading
+def testWarm(search):
+    gate = threading.Event()
+    build = search._build
+    search._build = lambda: gate.wait() and build()
+    ready = search.warm()
+    assert search.getAppID('Tomb Raider', timeout=0.01) == 203160
+    assert search.getAppID('tomb raidr', timeout=0.01) is None
+    assert not ready.is_set()
+    gate.set()
+    assert search.wait(1)
+    assert search.getAppID('tomb raidr') == 203160
+
+# names can not be looked up while the app list is still downloading
+def testWarmDownloading():
+    search = FuzzySearch()
+    search.loader = threading.Thread()
+    with pytest.raises(AppsLoading):
+        search.getAppID('Tomb Raider', timeout=0.01)
+
+# unchanged lists are not downloaded again
+def testNotModified(applist, tmp_path):
+    path = str(tmp_path / 'applist.idx')
+    applist.fetched = 1000
+    applist.save(path)
+    session = Transport(lambda url, **kwargs: Response(status_code=304))
+    data = AppList.shared(path, max_age=60, session=session)
+    assert session.calls[0]['headers']['If-Modified-Since'] == 'Thu, 01 Jan 1970 00:16:40 GMT'
+    assert data.name(0) == 'Tomb Raider'
+    assert not data.isStale(60)
+    assert not AppList.load(path).isStale(60)
+
+# error pages are not saved as an empty list, the stale list is kept
+def testDownloadError(applist, tmp_path):
+    unavailable = Transport(lambda url, **kwargs: Response(status_code=503))
+    path = str(tmp_path / 'applist.idx')
+    with pytest.raises(requests.HTTPError):
+        AppList.shared(path, session=unavailable)
+    applist.fetched = 1000
+    applist.save(path)
+    data = AppList.shared(path, max_age=60, session=unavailable)
+    assert len(data) == 3
+    assert not data.isStale(60)
+    assert AppList.load(path).fetched == 1000
+
+# stale lists are kept when the changes can not be requested
+def testUpdateError(applist, tmp_path):
+    path = str(tmp_path / 'applist.idx')
+    applist.fetched = 1000
+    applist.save(path)
+    session = Transport(lambda url, **kwargs: Response(ValueError('not json'), 403))
+    with pytest.raises(requests.HTTPError):
+        applist.update('key', session)
+    data = AppList.shared(path, max_age=60, session=session, key='key')
+    assert data.name(0) == 'Tomb Raider'
+    assert AppList.shared(path, max_age=60, session=session, key='key') is data
+    assert session.requests == 2
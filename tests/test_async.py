@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+
+"""Tests for `steamstorefront` asyncio client."""
+
+import asyncio
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web
+
+from steamstorefront import AsyncSteamStoreFront
+
+
+# local stand-in for the appdetails and appreviews endpoints
+async def appdetails(request):
+    appid = request.query['appids']
+    if 'filters' in request.query:
+        return web.json_response({appid: {'success': True, 'data': {'price_overview': {'final': 1999}}}
+                                  for appid in appid.split(',')})
+    return web.json_response({appid: {'success': True, 'data': {'name': 'Tomb Raider', 'steam_appid': int(appid),
+                                                                'packages': [1, 2]}}})
+
+
+async def packagedetails(request):
+    return web.json_response({packageid: {'success': True, 'data': {'name': 'Package ' + packageid}}
+                              for packageid in request.query['packageids'].split(',')})
+
+
+async def appreviews(request):
+    return web.json_response({'query_summary': {'total_positive': 90, 'total_reviews': 100}})
+
+
+def run(test):
+    async def main():
+        server = web.Application()
+        server.router.add_get('/api/appdetails', appdetails)
+        server.router.add_get('/api/packagedetails', packagedetails)
+        server.router.add_get('/appreviews/{appid}', appreviews)
+        runner = web.AppRunner(server)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        base = 'http://127.0.0.1:{}'.format(runner.addresses[0][1])
+
+        ssf = AsyncSteamStoreFront(concurrency=4)
+        ssf.client.app.api_url = base + '/api/appdetails?appids='
+        ssf.client.package.api_url = base + '/api/packagedetails?packageids='
+        ssf.client.app.prices.api_url = base + '/api/appdetails?filters=price_overview&cc={}&appids={}'
+        ssf.client.app._ratingsUrl = lambda appid: base + '/appreviews/' + appid + '?json=1'
+        try:
+            return await test(ssf)
+        finally:
+            await ssf.close()
+            await runner.cleanup()
+
+    return asyncio.run(main())
+
+# returns name
+def testGetName():
+    async def test(ssf):
+        assert await ssf.getName(appid=203160, category='app') == "Tomb Raider"
+        assert (await ssf.getRaw(appid=203160, category='app'))['steam_appid'] == 203160
+        assert ssf.getCacheStats()['app']['misses'] == 1
+    run(test)
+
+# returns price in currency
+def testGetPrice():
+    async def test(ssf):
+        assert await ssf.getPrice(appid=203160, category='app', currency='us') == {'final': 1999}
+    run(test)
+
+# returns prices of many apps
+def testGetPrices():
+    async def test(ssf):
+        assert await ssf.getPrices([203160, 730], 'us') == {203160: {'final': 1999}, 730: {'final': 1999}}
+    run(test)
+
+# returns details of every package of an app
+def testGetPackages():
+    async def test(ssf):
+        assert await ssf.getPackages(appid=203160) == [1, 2]
+        data = await ssf.getPackages(appid=203160, details=True)
+        assert data == {1: {'name': 'Package 1'}, 2: {'name': 'Package 2'}}
+    run(test)
+
+# returns ratings
+def testGetRatings():
+    async def test(ssf):
+        data = await ssf.getRatings(appid=203160, category='app')
+        assert data[0] == 90
+    run(test)
+
+# returns results for many ids
+def testGetMany():
+    async def test(ssf):
+        data = await ssf.getMany([1, 2, 3], fields=['getName'])
+        assert data[2]['data']['getName'] == "Tomb Raider"
+        assert data[3]['success'] == True
+    run(test)
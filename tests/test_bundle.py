@@ -2,12 +2,20 @@
 
 """Tests for `steamstorefront` package."""
 
+import os
+
 import pytest
 
+from bs4.builder import builder_registry
 from click.testing import CliRunner
 
 from steamstorefront import SteamStoreFront
 from steamstorefront import cli
+from steamstorefront.bundle import Bundle
+from steamstorefront.cache import LRUCache
+from steamstorefront import bundle as bundle_module
+
+from .conftest import Response, Transport
 
 # Shadow of the Tomb Raider: Definitive Edition
 appid = 12231
@@ -92,4 +100,128 @@ def testGetPrice(app):
 def testGetPackageItem(app):
     data = app.getPackageItem(appid=appid, category='bundle')
     test = (type(data) == type(list()) and data[0]['name'] == "Shadow of the Tomb Raider - Deluxe Extras")
-    assert test == True
\ No newline at end of file
+    assert test == True
+
+# saved bundle page, parsed without network
+@pytest.fixture
+def page():
+    with open(os.path.join(os.path.dirname(__file__), 'data', 'bundle.html'), 'rb') as f:
+        return f.read()
+
+# every available parser returns the same details as html5lib
+@pytest.mark.parametrize('parser', [parser for parser in ('html.parser', 'lxml') if builder_registry.lookup(parser)])
+def testParsers(page, parser):
+    expected = Bundle(parser='html5lib')._parse(str(appid), page, False)
+    data = Bundle(parser=parser)._parse(str(appid), page, False)
+    assert data == expected
+    assert data['name'] == "Shadow of the Tomb Raider: Definitive Edition"
+    assert data['package_item'][1]['appid'] == [974630, 974631]
+
+# unknown parsers are rejected
+def testInvalidParser():
+    with pytest.raises(ValueError):
+        Bundle(parser='missing')
+
+
+# serves the saved page for every bundle
+def pages(page):
+    return Transport(lambda url, **kwargs: Response(content=page))
+
+# fields are parsed from their regions only, with the same values as a full parse
+@pytest.mark.parametrize('parser', ['html5lib', 'html.parser'])
+def testParseFields(page, parser):
+    expected = Bundle(parser='html5lib')._parse(str(appid), page, False)
+    bundle = Bundle(parser=parser)
+    data = bundle._parse(str(appid), page, False, ('genres',))
+    assert data['genres'] == expected['genres']
+    assert 'price' not in data
+    data = bundle._parse(str(appid), page, False, ('price', 'name'))
+    assert data['price'] == expected['price'] and data['genres'] == expected['genres']
+
+# download stops after the regions of the requested fields
+def testGetNameStopsEarly(page):
+    session = pages(page)
+    bundle = Bundle(session=session, parser='html.parser')
+    bundle.chunk_size = 512
+    assert bundle.getName(str(appid)) == "Shadow of the Tomb Raider: Definitive Edition"
+    assert session.responses[-1].read < len(page)
+    assert bundle.getGenres(str(appid)) == ['Action', 'Adventure']
+
+# regions before the stop are parsed too, partial entries are completed with the whole page
+def testGetFieldsRequests(page):
+    session = pages(page)
+    bundle = Bundle(session=session, parser='html.parser')
+    bundle.chunk_size = 512
+    assert bundle.getPrice(str(appid))['final'] is not None
+    assert bundle.getName(str(appid)) == "Shadow of the Tomb Raider: Definitive Edition"
+    assert session.requests == 1
+    assert bundle.getGenres(str(appid)) == ['Action', 'Adventure']
+    assert bundle.getDRM(str(appid)) is not None
+    assert session.requests == 2
+
+    session = pages(page)
+    bundle = Bundle(session=session, parser='html.parser')
+    bundle.getName(str(appid))
+    bundle.getPrice(str(appid))
+    bundle.getGenres(str(appid))
+    assert session.requests == 2
+
+# pages are parsed in worker processes and cached
+def testCrawl(page):
+    bundle = Bundle(session=pages(page), parser='html.parser')
+    results = dict(bundle.crawl([1, 2, 3], processes=2, threads=2))
+    assert sorted(results) == ['1', '2', '3']
+    assert results['2']['data']['genres'] == ['Action', 'Adventure']
+    assert bundle.getName('3') == "Shadow of the Tomb Raider: Definitive Edition"
+    assert dict(bundle.crawl([3]))['3']['success']
+
+# package rows are read in one walk of each row
+def testPackageItems(page):
+    data = Bundle(parser='html.parser')._parse(str(appid), page, False)
+    assert data['package_item'][1] == {
+        'name': 'Shadow of the Tomb Raider - Season Pass',
+        'packageid': None,
+        'appid': [974630, 974631],
+        'app_link': 'https://store.steampowered.com/sub/353361/',
+        'app_image': 'https://steamcdn-a.akamaihd.net/steam/subs/353361/capsule_184x69.jpg',
+        'app_price': {'final': None, 'final_formatted': None},
+        'platforms': {'windows': True, 'mac': True, 'linux': True},
+        'categories': ['Action'],
+    }
+    assert data['package_item'][0]['app_price'] == {'final': 1599, 'final_formatted': '$15.99'}
+    assert data['package_item'][0]['platforms'] == {'windows': True, 'mac': False, 'linux': False}
+
+# pages differing only in scripts and whitespace are parsed once
+def testParseMemo(page, monkeypatch):
+    calls = []
+    parse = bundle_module.parsePage
+    monkeypatch.setattr(bundle_module, 'parsePage', lambda *args: calls.append(args) or parse(*args))
+    bundle = Bundle(parser='html.parser')
+    first = bundle._parse('1', page, False)
+    changed = page.replace(b'var g_sessionID = "0";', b'var g_sessionID = "1";').replace(b'\t', b'  ')
+    assert bundle._parse('2', changed, False) == first
+    assert len(calls) == 1
+    bundle._parse('3', page.replace(b'Edition</h2>', b'Edition II</h2>'), False)
+    assert len(calls) == 2
+
+# memoized pages do not evict payloads from a bounded cache
+def testParseMemoCache(page):
+    cache = LRUCache(1)
+    bundle = Bundle(cache=cache, parser='html.parser')
+    bundle._parse('1', page, False)
+    assert cache.get(bundle._key('1'))['genres'] == ['Action', 'Adventure']
+    assert len(bundle.pages) == 1
+    client = SteamStoreFront(cache=LRUCache(10))
+    assert client.bundle.pages is not client.bundle.cache
+
+# pages with the columns in another order are read whole instead of caching missing fields
+def testGetFieldsReordered(page):
+    start, middle, end = page.index(b'\t\t\t<div class="leftcol">'), page.index(b'\t\t\t<div class="rightcol">'), page.index(b'\t\t</div>\n\t</div>\n\t<div id="footer">')
+    session = pages(page[:start] + page[middle:end] + page[start:middle] + page[end:])
+    bundle = Bundle(session=session, parser='html.parser')
+    bundle.chunk_size = 512
+    assert bundle.getPrice(str(appid))['final'] == 2399
+    assert session.requests == 2
+    assert bundle.getGenres(str(appid)) == ['Action', 'Adventure']
+    assert bundle.getName(str(appid)) == "Shadow of the Tomb Raider: Definitive Edition"
+    assert session.requests == 2
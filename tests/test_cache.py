@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+
+"""Tests for `steamstorefront` cache."""
+
+import pytest
+
+from steamstorefront import SteamStoreFront
+from steamstorefront.cache import LRUCache, SQLiteCache
+
+from .conftest import Transport, ids
+
+
+@pytest.fixture
+def cache():
+    data = LRUCache(capacity=2)
+    return data
+
+# returns stored value
+def testGetSet(cache):
+    cache.set(('app', '10', None, None), {'name': 'Counter-Strike'})
+    assert cache.get(('app', '10', None, None)) == {'name': 'Counter-Strike'}
+    assert cache.get(('app', '20', None, None)) is None
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+# evicts least recently used
+def testEviction(cache):
+    cache.set(('app', '10', None, None), 1)
+    cache.set(('app', '20', None, None), 2)
+    cache.get(('app', '10', None, None))
+    cache.set(('app', '30', None, None), 3)
+    assert ('app', '10', None, None) in cache
+    assert ('app', '20', None, None) not in cache
+    assert len(cache) == 2
+
+# currency and language are part of the key
+def testKeyIncludesCurrency(cache):
+    cache.set(('app', '10', 'us', None), 1)
+    assert cache.get(('app', '10', 'in', None)) is None
+
+# replaced entries keep their place, missing ones are not added
+def testReplace(cache):
+    cache.set(('app', '10', None, None), 1)
+    cache.set(('app', '20', None, None), 2)
+    cache.replace(('app', '10', None, None), 10)
+    cache.replace(('app', '30', None, None), 3)
+    cache.set(('app', '40', None, None), 4)
+    assert ('app', '10', None, None) not in cache and ('app', '30', None, None) not in cache
+    assert cache.get(('app', '20', None, None)) == 2
+
+
+@pytest.fixture
+def sqlite(tmp_path):
+    data = SQLiteCache(str(tmp_path / 'cache.db'), ttl={'app': 60})
+    yield data
+    data.close()
+
+# returns stored value from disk
+def testSQLiteGetSet(sqlite):
+    sqlite.set(('bundle', '12231', None, None), {'categories': [{2: 'Single-player'}]})
+    assert sqlite.get(('bundle', '12231', None, None)) == {'categories': [{2: 'Single-player'}]}
+    assert sqlite.get(('bundle', '1', None, None)) is None
+    assert len(sqlite) == 1
+
+# entries survive reopening the database
+def testSQLitePersistence(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    first = SQLiteCache(path)
+    first.set(('app', '10', 'us', None), {'name': 'Counter-Strike'})
+    first.close()
+    second = SQLiteCache(path)
+    assert second.get(('app', '10', 'us', None)) == {'name': 'Counter-Strike'}
+    assert second.get(('app', '10', None, None)) is None
+    second.close()
+
+# expired entries are misses
+def testSQLiteTTL(sqlite):
+    sqlite.ttl['app'] = -1
+    sqlite.set(('app', '10', None, None), {'name': 'Counter-Strike'})
+    assert sqlite.get(('app', '10', None, None)) is None
+    sqlite.purge()
+    assert len(sqlite) == 0
+
+# replaced entries expire as first stored
+def testSQLiteReplace(sqlite):
+    sqlite.set(('app', '10', None, None), {'name': 'Counter-Strike'})
+    fetched = sqlite._conn.execute('SELECT fetched FROM payload').fetchone()
+    sqlite.replace(('app', '10', None, None), {'name': 'Counter-Strike 2'})
+    sqlite.replace(('app', '20', None, None), {'name': 'Team Fortress'})
+    assert sqlite.get(('app', '10', None, None)) == {'name': 'Counter-Strike 2'}
+    assert sqlite._conn.execute('SELECT fetched FROM payload').fetchone() == fetched
+    assert len(sqlite) == 1
+
+# answers appdetails requests
+def appdetails(url, **kwargs):
+    appid = ids(url, "appids")[0]
+    return {appid: {'success': True, 'data': {'name': 'App ' + appid}}}
+
+# restarted clients read getRaw from the persistent cache, refresh fetches again
+def testGetRawCached(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    session = Transport(appdetails)
+    assert SteamStoreFront(cache=SQLiteCache(path), session=session).getRaw(appid=10) == {'name': 'App 10'}
+    client = SteamStoreFront(cache=SQLiteCache(path), session=session)
+    assert client.getRaw(appid=10) == {'name': 'App 10'}
+    assert len(session.urls) == 1
+    assert client.getRaw(appid=10, refresh=True) == {'name': 'App 10'}
+    assert len(session.urls) == 2
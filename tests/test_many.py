@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+
+"""Tests for `steamstorefront` batch lookups."""
+
+import pytest
+
+from steamstorefront import SteamStoreFront
+
+from .conftest import Transport, ids
+
+
+# answers appdetails, price and packagedetails requests, 13 fails
+def store(url, **kwargs):
+    if "packageids=" in url:
+        return {packageid: {'success': packageid != '20', 'data': {'name': 'Package ' + packageid}}
+                for packageid in ids(url, "packageids")}
+    appids = ids(url, "appids")
+    if "filters=price_overview" in url:
+        return {appid: {'success': True, 'data': {'price_overview': {'final': int(appid)}}} for appid in appids}
+    if appids == ['13']:
+        raise ConnectionError("store unavailable")
+    return {appids[0]: {'success': True, 'data': {'name': 'App ' + appids[0]}}}
+
+
+@pytest.fixture
+def client():
+    data = SteamStoreFront(session=Transport(store), price_window=0)
+    return data
+
+# an error for one id is returned in its result
+def testErrors(client):
+    data = client.getMany([10, 13], fields=["getName"])
+    assert data[10] == {'success': True, 'data': {'getName': 'App 10'}, 'error': None}
+    assert not data[13]['success'] and isinstance(data[13]['error'], ConnectionError)
+
+# cached ids are not requested again
+def testCached(client):
+    client.getRaw(appid=10)
+    data = client.getMany([10, 11])
+    assert data[10]['data'] == {'name': 'App 10'} and data[11]['data'] == {'name': 'App 11'}
+    assert len(client.session.urls) == 2
+
+# prices in a currency are requested in one batch
+def testPrices(client):
+    data = client.getMany([10, 11, 12], fields=["getPrice"], currency="us")
+    assert data[11]['data'] == {'getPrice': {'final': 11}}
+    assert len(client.session.urls) == 1
+
+# packages are requested in one batch and read by the workers from cache
+def testPackages(client):
+    data = client.getMany([10, 20], category="sub")
+    assert data[10]['data'] == {'name': 'Package 10'}
+    assert data[20] == {'success': True, 'data': {}, 'error': None}
+    assert len(client.session.urls) == 1
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+"""Tests for `steamstorefront` name indexes."""
+
+import pytest
+
+from steamstorefront.nameindex import NameIndex, PrefixIndex, TrigramIndex, normalize, stripEdition
+
+names = [
+    'Tomb Raider',
+    'Shadow of the Tomb Raider: Definitive Edition',
+    'Counter-Strike: Global Offensive',
+    'The Witcher® 3: Wild Hunt',
+    'Pokémon™ Café',
+    'TOMB RAIDER',
+]
+
+
+@pytest.fixture
+def trigrams():
+    data = TrigramIndex.build((idx, normalize(name)) for idx, name in enumerate(names))
+    return data
+
+# removes case, accents, symbols and punctuation
+def testNormalize():
+    assert normalize('The Witcher® 3: Wild Hunt') == 'the witcher 3 wild hunt'
+    assert normalize('Pokémon™  Café') == 'pokemon cafe'
+    assert normalize('Counter-Strike') == 'counter strike'
+
+# closest names come first
+def testCandidates(trigrams):
+    assert trigrams.candidates('tomb raider')[:3] == [0, 5, 1]
+    assert trigrams.candidates('witcher 3')[0] == 3
+    assert trigrams.candidates('pokemon cafe')[0] == 4
+    assert trigrams.candidates('xyzzy') == []
+
+# limits number of candidates
+def testLimit(trigrams):
+    assert len(trigrams.candidates('tomb raider', limit=1)) == 1
+
+# added names merged into the arrays give the same index as a build
+def testTrigramMerge():
+    normalized = [normalize(name) for name in names]
+    data = TrigramIndex.build(enumerate(normalized[:3]))
+    for idx in range(3, len(names)):
+        data.add(idx, normalized[idx])
+    data.merge()
+    expected = TrigramIndex.build(enumerate(normalized))
+    assert (data.keys, data.starts, data.postings, data.added) == (expected.keys, expected.starts, expected.postings, {})
+    assert data.candidates('pokemon cafe', limit=1) == [4]
+
+
+@pytest.fixture
+def exact():
+    data = NameIndex.build((idx, normalize(name)) for idx, name in enumerate(names))
+    return data
+
+# removes edition suffixes
+def testStripEdition():
+    assert stripEdition('shadow of the tomb raider definitive edition') == 'shadow of the tomb raider'
+    assert stripEdition('the witcher 3 wild hunt goty') == 'the witcher 3 wild hunt'
+    assert stripEdition('portal 2') == 'portal 2'
+
+# returns every index with the same normalized name
+def testLookup(exact):
+    assert exact.lookup('tomb raider') == [0, 5]
+    assert exact.lookup('The Witcher 3 - Wild Hunt') == [3]
+    assert exact.lookup('Counter-Strike: Global Offensive Gold Edition') == [2]
+    assert exact.lookup('Shadow of the Tomb Raider') == [1]
+    assert exact.lookup('Half-Life') == []
+
+# added names merged into the arrays give the same index as a build
+def testNameMerge():
+    normalized = [normalize(name) for name in names]
+    data = NameIndex.build(enumerate(normalized[:3]))
+    for idx in range(3, len(names)):
+        data.add(idx, normalized[idx])
+    data.merge()
+    expected = NameIndex.build(enumerate(normalized))
+    assert (data.hashes, data.indexes, data.bases, data.base_indexes) == \
+        (expected.hashes, expected.indexes, expected.bases, expected.base_indexes)
+    assert data.lookup('tomb raider') == [0, 5]
+
+
+@pytest.fixture
+def prefixes():
+    data = PrefixIndex.build([normalize(name) for name in names])
+    return data
+
+# names starting with prefix come before names with a word starting with it
+def testPrefix(prefixes):
+    assert prefixes.lookup('tomb r') == [0, 5, 1]
+    assert prefixes.lookup('Wild') == [3]
+    assert prefixes.lookup('the') == [3, 1]
+    assert prefixes.lookup('xyz') == []
+    assert prefixes.lookup('') == []
+
+# ranked matches, limited
+def testPrefixRank(prefixes):
+    assert prefixes.lookup('tomb', limit=2, rank=lambda idx: idx) == [5, 1]
+
+# matches without a score rank below scored ones, in scan order
+def testPrefixRankPartial(prefixes):
+    assert prefixes.lookup('tomb', rank={1: 500}.get) == [1, 0, 5]
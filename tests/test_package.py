@@ -8,6 +8,9 @@ from click.testing import CliRunner
 
 from steamstorefront import SteamStoreFront
 from steamstorefront import cli
+from steamstorefront.package import Package
+
+from .conftest import Response, Transport, ids
 
 appid = 58375
 
@@ -76,4 +79,38 @@ def testGetController(app):
 def testGetReleaseDate(app):
     data = app.getReleaseDate(appid=appid, category='package')
     test = (type(data) == type(dict()) and data['coming_soon'] == False)
-    assert test == True
\ No newline at end of file
+    assert test == True
+
+
+# answers appdetails and packagedetails requests, 2 does not exist and requests with 5 fail
+def store(url, **kwargs):
+    if "appids=" in url:
+        return {ids(url, "appids")[0]: {'success': True, 'data': {'packages': [1, 2, 3]}}}
+    packageids = ids(url, "packageids")
+    if '5' in packageids:
+        return Response(None, 500)
+    return {packageid: {'success': packageid != '2', 'data': {'name': 'Package ' + packageid}} for packageid in packageids}
+
+# packages are requested in chunks, missing packages are {} and failed requests None
+def testGetPackages():
+    package = Package(session=Transport(store))
+    package.chunk_size = 2
+    data = package.getPackages([1, 2, 3, 5])
+    assert data == {1: {'name': 'Package 1'}, 2: {}, 3: None, 5: None}
+    assert len(package.session.urls) == 2
+    assert "packageids=1,2" in package.session.urls[0]
+
+# found packages are cached
+def testGetPackagesCached():
+    package = Package(session=Transport(store))
+    package.getPackages([1, 3], 'us')
+    assert package.getPackages([1, 3], 'us') == {1: {'name': 'Package 1'}, 3: {'name': 'Package 3'}}
+    assert len(package.session.urls) == 1
+    assert "cc=us" in package.session.urls[0]
+
+# details of every package of an app are fetched in one request
+def testGetPackagesDetails():
+    client = SteamStoreFront(session=Transport(store))
+    data = client.getPackages(appid=10, details=True)
+    assert data == {1: {'name': 'Package 1'}, 2: {}, 3: {'name': 'Package 3'}}
+    assert len(client.session.urls) == 2
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+
+"""Tests for `steamstorefront` price batching."""
+
+import pytest
+
+from steamstorefront.price import PriceBatcher
+
+from .conftest import Transport, ids
+
+
+# answers multi appid price requests, 10 is free
+def prices(url, **kwargs):
+    return {appid: {'success': True, 'data': [] if appid == '10' else {'price_overview': {'final': int(appid)}}}
+            for appid in ids(url, "appids")}
+
+
+@pytest.fixture
+def batcher():
+    data = PriceBatcher(Transport(prices), window=0, chunk_size=2)
+    return data
+
+# sends queued lookups in chunks
+def testGetMany(batcher):
+    data = batcher.getMany([10, 20, 30], 'us')
+    assert data == {10: None, 20: {'final': 20}, 30: {'final': 30}}
+    assert len(batcher.session.urls) == 2
+    assert "cc=us" in batcher.session.urls[0]
+
+# lookups within the window share a request
+def testWindow():
+    batcher = PriceBatcher(Transport(prices), window=0.05)
+    first = batcher.add(20, 'us')
+    second = batcher.add(30, 'us')
+    assert first.result(1) == {'final': 20}
+    assert second.result(1) == {'final': 30}
+    assert len(batcher.session.urls) == 1
+
+# null bodies resolve to None and failed chunks never strand the other lookups
+def testBadResponses():
+    def store(url, **kwargs):
+        appids = ids(url, "appids")
+        if '30' in appids:
+            raise ConnectionError("store unavailable")
+        return None if '10' in appids else prices(url)
+
+    batcher = PriceBatcher(Transport(store), window=0, chunk_size=1)
+    first, second, third = batcher.add(10, 'us'), batcher.add(20, 'us'), batcher.add(30, 'us')
+    batcher.flush()
+    assert first.result(1) is None
+    assert second.result(1) == {'final': 20}
+    with pytest.raises(ConnectionError):
+        third.result(1)
+    assert batcher.get(10, 'in', timeout=1) is None
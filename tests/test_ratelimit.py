@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+"""Tests for `steamstorefront` rate limiter."""
+
+import pytest
+
+from steamstorefront.errors import RateLimited
+from steamstorefront.ratelimit import RateLimiter, TokenBucket
+from steamstorefront.session import Session
+
+from .conftest import Adapter
+
+
+@pytest.fixture
+def limiter():
+    data = RateLimiter(limits={'appdetails': (2, 10), 'bundle': None})
+    return data
+
+# allows bursts up to capacity then waits
+def testTokenBucket():
+    bucket = TokenBucket(2, 10)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert 4 < bucket.reserve() <= 5
+
+# paused buckets wait for the pause
+def testPause():
+    bucket = TokenBucket(2, 10)
+    bucket.pause(30)
+    assert bucket.reserve() > 30
+
+# matches urls to endpoints
+def testEndpoint(limiter):
+    assert limiter.endpoint("https://store.steampowered.com/api/appdetails?appids=10") == 'appdetails'
+    assert limiter.endpoint("https://store.steampowered.com/bundle/12231") == 'bundle'
+    assert limiter.endpoint("https://store.steampowered.com/api/packagedetails?packageids=1") == 'packagedetails'
+    assert limiter.endpoint("https://example.com/") is None
+
+# disabled endpoints are not limited
+def testDisabled(limiter):
+    for i in range(10):
+        assert limiter.reserve("https://store.steampowered.com/bundle/12231") == 0
+
+# honors retry-after
+def testRetryAfter(limiter):
+    url = "https://store.steampowered.com/api/appdetails?appids=10"
+    assert limiter.delay(url, 0, '30') == 0
+    assert limiter.reserve(url) >= 30
+    assert limiter.delay("https://store.steampowered.com/bundle/12231", 0, '7') == 7
+    assert limiter.shouldRetry(429) and limiter.shouldRetry(503) and not limiter.shouldRetry(404)
+
+
+# returns adapter answering with statuses in order, then 200
+def throttled(statuses):
+    statuses = list(statuses)
+    return Adapter(lambda request: (statuses.pop(0) if statuses else 200, {'Retry-After': '0'}, b'{}'))
+
+# 429 and 5xx are retried after retry-after
+def testSessionRetry():
+    store = throttled([429, 503])
+    session = Session(limiter=RateLimiter(limits={'appdetails': None}), conditional=False)
+    session.mount('https://', store)
+    res = session.get("https://store.steampowered.com/api/appdetails?appids=10")
+    assert res.status_code == 200
+    assert len(store.requests) == 3
+
+# still throttled after max_retries raises instead of looking like a missing app
+def testSessionRateLimited():
+    store = throttled([429] * 5)
+    session = Session(limiter=RateLimiter(limits={'appdetails': None}, max_retries=2), conditional=False)
+    session.mount('https://', store)
+    with pytest.raises(RateLimited):
+        session.get("https://store.steampowered.com/api/appdetails?appids=10")
+    assert len(store.requests) == 3
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+
+"""Tests for `steamstorefront` session."""
+
+import pytest
+
+from steamstorefront import SteamStoreFront
+from steamstorefront.cache import LRUCache, SQLiteCache
+from steamstorefront.ratelimit import RateLimiter
+from steamstorefront.session import Session
+
+from .conftest import Adapter
+
+
+# local stand-in for the store, answers 304 when the etag matches
+def conditional(request):
+    if request.headers.get('If-None-Match') == '"v1"':
+        return 304, {}, b''
+    return 200, {'ETag': '"v1"'}, b'{"730": {"success": true}}'
+
+
+@pytest.fixture
+def store():
+    data = Adapter(conditional)
+    return data
+
+# second request is conditional, 304 is answered with the stored body
+def testNotModified(store):
+    session = Session(limiter=RateLimiter(limits={}))
+    session.mount('https://', store)
+    url = 'https://store.steampowered.com/api/appdetails?appids=730'
+    assert session.get(url).json() == {'730': {'success': True}}
+    res = session.get(url)
+    assert store.requests[1].headers['If-None-Match'] == '"v1"'
+    assert res.status_code == 200
+    assert res.json() == {'730': {'success': True}}
+
+# disabled sessions send plain requests
+def testUnconditional(store):
+    session = Session(limiter=RateLimiter(limits={}), conditional=False)
+    session.mount('https://', store)
+    url = 'https://store.steampowered.com/api/appdetails?appids=730'
+    session.get(url)
+    session.get(url)
+    assert 'If-None-Match' not in store.requests[1].headers
+
+# stored responses are kept apart from bounded payload caches
+def testValidatorsStore(tmp_path):
+    cache = LRUCache(10)
+    assert SteamStoreFront(cache=cache).session.validators is not cache
+    cache = SQLiteCache(str(tmp_path / 'cache.db'))
+    assert SteamStoreFront(cache=cache).session.validators is cache
+    cache.close()
+
+# app, package, bundle and fuzzy search share the pooled session of the facade
+def testShared():
+    client = SteamStoreFront()
+    assert isinstance(client.session, Session)
+    assert client.app.session is client.session
+    assert client.package.session is client.session
+    assert client.bundle.session is client.session
+    assert client._getSearch().session is client.session
+    assert client._clone().bundle.session is client.session
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+
+"""Tests for `steamstorefront` request coalescing."""
+
+import threading
+import time
+
+import pytest
+
+from steamstorefront.ratelimit import RateLimiter
+from steamstorefront.session import Session
+from steamstorefront.singleflight import SingleFlight
+
+from .conftest import Adapter
+
+
+@pytest.fixture
+def flight():
+    data = SingleFlight()
+    return data
+
+# concurrent callers share one call
+def testShared(flight):
+    calls = []
+    results = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return 'Tomb Raider'
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do('203160', fetch))) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ['Tomb Raider'] * 5
+
+# errors are raised for every caller and not remembered
+def testError(flight):
+    def fail():
+        raise ValueError('throttled')
+
+    with pytest.raises(ValueError):
+        flight.do('203160', fail)
+    assert flight.do('203160', lambda: 'Tomb Raider') == 'Tomb Raider'
+
+
+# slow store
+def slow(request):
+    time.sleep(0.1)
+    return 200, {}, b'{}'
+
+# concurrent identical GET requests share one response, different params or cookies do not
+def testSession():
+    store = Adapter(slow)
+    session = Session(limiter=RateLimiter(limits={'appdetails': None}), conditional=False)
+    session.mount('https://', store)
+    url = 'https://store.steampowered.com/api/appdetails'
+    calls = [{'params': {'appids': '10'}}] * 4 + [{'params': {'appids': '20'}},
+                                                  {'params': {'appids': '10'}, 'cookies': {'cc': 'us'}}]
+    responses = []
+
+    threads = [threading.Thread(target=lambda kwargs=kwargs: responses.append(session.get(url, **kwargs)))
+               for kwargs in calls]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(responses) == 6
+    assert len(store.requests) == 3
+    assert sorted(request.url for request in store.requests) == [url + '?appids=10', url + '?appids=10',
+                                                                 url + '?appids=20']